@@ -0,0 +1,86 @@
+import os
+from typing import Annotated, AsyncIterator, Iterator
+
+import anyio.from_thread
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from bulk_import import DEFAULT_CHUNK_SIZE, import_users
+from db import get_session
+from rbac import get_admin_user
+
+IMPORT_MAX_BODY_BYTES = int(
+    os.getenv("IMPORT_MAX_BODY_BYTES", str(64 * 1024 * 1024))
+)
+
+router = APIRouter(prefix="/admin")
+
+
+def _body_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"Import body exceeds {IMPORT_MAX_BODY_BYTES} bytes",
+    )
+
+
+async def ndjson_batches(
+    request: Request, max_bytes: int
+) -> AsyncIterator[list[bytes]]:
+    """Complete lines of the request body, one list per received chunk."""
+    received = 0
+    pending = b""
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise _body_too_large()
+        *lines, pending = (pending + chunk).split(b"\n")
+        if lines:
+            yield lines
+    if pending:
+        yield [pending]
+
+
+def _lines_from(batches: AsyncIterator[list[bytes]]) -> Iterator[bytes]:
+    # runs on the threadpool, pulling each batch from the event loop
+    while True:
+        try:
+            batch = anyio.from_thread.run(anext, batches)
+        except StopAsyncIteration:
+            return
+        yield from batch
+
+
+@router.post(
+    "/users/import",
+    dependencies=[Depends(get_admin_user)],
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/x-ndjson": {}},
+            "required": True,
+        }
+    },
+)
+async def import_users_route(
+    request: Request,
+    session: Session = Depends(get_session),
+    chunk_size: Annotated[int, Query(ge=1, le=10_000)] = DEFAULT_CHUNK_SIZE,
+):
+    """Import NDJSON users as the body streams in.
+
+    Chunks already inserted stay committed if the body turns out to be
+    larger than IMPORT_MAX_BODY_BYTES partway through.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and int(content_length) > IMPORT_MAX_BODY_BYTES:
+        raise _body_too_large()
+    # one pool for the whole app, created in the lifespan
+    executor = getattr(request.app.state, "import_executor", None)
+    report = await run_in_threadpool(
+        import_users,
+        session,
+        _lines_from(ndjson_batches(request, IMPORT_MAX_BODY_BYTES)),
+        chunk_size,
+        executor,
+    )
+    return report.as_dict()
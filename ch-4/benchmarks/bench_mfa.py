@@ -0,0 +1,86 @@
+"""Cost of rejected /verify-totp requests.
+
+Compares a wrong code that has to look up the user (cold secret cache,
+the old behaviour for every guess), a wrong code with the secret cached,
+and a guess rejected by the attempt limiter.
+
+Run from ch-4 with: python -m benchmarks.bench_mfa
+"""
+import os
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+import pyotp
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import mfa
+from models import Base, User
+
+N = 20_000
+
+
+def run(label, session, queries, prepare):
+    queries.clear()
+    start = time.perf_counter()
+    for _ in range(N):
+        prepare()
+        try:
+            mfa.verify_totp(code="000000", username="bench", session=session)
+        except HTTPException:
+            pass
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<28} {elapsed / N * 1e6:8.1f} us/request"
+        f" {len(queries) / N:6.2f} queries/request"
+    )
+
+
+def main():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(
+        User(
+            username="bench",
+            email="bench@example.com",
+            hashed_password="x",
+            totp_secret=pyotp.random_base32(),
+        )
+    )
+    session.commit()
+
+    queries = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda *args: queries.append(args[2]),
+    )
+    # never let the limiter trigger in the first two runs
+    unlimited = mfa.MemoryMFAStore(max_attempts=N + 1, window=3600)
+
+    def cold():
+        unlimited.reset("bench")
+        mfa.totp_cache.clear()
+
+    def warm():
+        unlimited.reset("bench")
+
+    mfa.mfa_store = unlimited
+    run("wrong code, secret uncached", session, queries, cold)
+    run("wrong code, secret cached", session, queries, warm)
+    mfa.mfa_store = mfa.MemoryMFAStore(max_attempts=1, window=3600)
+    run("rate limited", session, queries, lambda: None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Per-request overhead of RateLimitMiddleware.
+
+Drives a bare ASGI app directly (no HTTP, no FastAPI routing) so the
+numbers isolate the limiter: an unlimited path, a per-IP check and a
+per-IP + per-username check that has to buffer and parse a form body.
+Each request comes from a different IP so buckets are never exhausted.
+
+Run from ch-4 with: python -m benchmarks.bench_rate_limit
+"""
+import asyncio
+import time
+
+from rate_limit import Rate, RateLimitMiddleware, RouteRateLimit
+
+N = 100_000
+PLENTY = Rate(per_second=1_000_000, burst=1_000_000)
+RULES = (
+    RouteRateLimit("POST", "/ip", per_ip=PLENTY),
+    RouteRateLimit(
+        "POST",
+        "/token",
+        per_ip=PLENTY,
+        per_username=PLENTY,
+        username_from="form",
+    ),
+)
+BODY = b"grant_type=password&username=alice&password=secret"
+
+
+async def ok_app(scope, receive, send):
+    await receive()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": BODY, "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, path: str) -> float:
+    start = time.perf_counter()
+    for n in range(N):
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": path,
+            "query_string": b"",
+            "client": (f"10.{n >> 16 & 255}.{n >> 8 & 255}.{n & 255}", 1234),
+        }
+        await app(scope, receive, send)
+    return (time.perf_counter() - start) / N * 1e6
+
+
+async def main():
+    baseline = await run(ok_app, "/ip")
+    limited = RateLimitMiddleware(ok_app, rules=RULES)
+    print(f"{'no middleware':<28} {baseline:6.2f} us/request")
+    for label, path in (
+        ("unlimited path", "/other"),
+        ("per-ip bucket", "/ip"),
+        ("per-ip + username (form)", "/token"),
+    ):
+        cost = await run(limited, path)
+        print(
+            f"{label:<28} {cost:6.2f} us/request"
+            f" (+{cost - baseline:.2f} us)"
+        )
+    print(f"live buckets: {len(limited.store)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
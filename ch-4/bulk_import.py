@@ -0,0 +1,282 @@
+"""Bulk user import from NDJSON.
+
+Each line is a JSON object with ``username``, ``email`` and either
+``password`` or an already bcrypt-hashed ``hashed_password``, plus an
+optional ``role``. Plain passwords are hashed in parallel across
+processes and rows are inserted in chunked transactions; rows that clash
+with existing users are reported instead of aborting the import.
+
+Usage::
+
+    python bulk_import.py users.ndjson --chunk-size 1000 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from pydantic import BaseModel, EmailStr, ValidationError, model_validator
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Role, User
+from operations import pwd_context
+
+DEFAULT_CHUNK_SIZE = 1000
+# hashing processes shared by every import the API runs
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", str(os.cpu_count() or 1)))
+
+
+class UserImportRecord(BaseModel):
+    username: str
+    email: EmailStr
+    password: str | None = None
+    hashed_password: str | None = None
+    role: Role = Role.basic
+
+    @model_validator(mode="after")
+    def check_password(self):
+        if self.hashed_password is not None:
+            if pwd_context.identify(self.hashed_password) is None:
+                raise ValueError("hashed_password is not a bcrypt hash")
+        elif self.password is None:
+            raise ValueError("password or hashed_password is required")
+        return self
+
+
+@dataclass
+class ImportReport:
+    created: int = 0
+    conflicts: list[dict] = field(default_factory=list)
+    invalid: list[dict] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def users_per_second(self) -> float:
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "created": self.created,
+            "conflicts": self.conflicts,
+            "invalid": self.invalid,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "users_per_second": round(self.users_per_second, 1),
+        }
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def parse_ndjson(
+    lines: Iterable[str | bytes], report: ImportReport
+) -> Iterator[tuple[int, UserImportRecord]]:
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = UserImportRecord.model_validate_json(line)
+        except ValidationError as e:
+            report.invalid.append(
+                {
+                    "line": line_number,
+                    "error": e.errors(include_url=False)[0]["msg"],
+                }
+            )
+            continue
+        yield line_number, record
+
+
+def _chunked(
+    records: Iterator[tuple[int, UserImportRecord]], size: int
+) -> Iterator[list[tuple[int, UserImportRecord]]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _hash_chunk(
+    chunk: list[tuple[int, UserImportRecord]],
+    executor: Executor | None,
+):
+    pending = [
+        record for _, record in chunk if record.hashed_password is None
+    ]
+    passwords = [record.password for record in pending]
+    if executor is None:
+        hashes = map(hash_password, passwords)
+    else:
+        hashes = executor.map(
+            hash_password,
+            passwords,
+            chunksize=max(1, len(passwords) // 64),
+        )
+    for record, hashed in zip(pending, hashes):
+        record.hashed_password = hashed
+
+
+def _drop_conflicts(
+    session: Session,
+    chunk: list[tuple[int, UserImportRecord]],
+    report: ImportReport,
+) -> list[tuple[int, UserImportRecord]]:
+    usernames = {record.username for _, record in chunk}
+    emails = {record.email for _, record in chunk}
+    existing = session.execute(
+        select(User.username, User.email).where(
+            or_(User.username.in_(usernames), User.email.in_(emails))
+        )
+    ).all()
+    taken_usernames = {row.username for row in existing}
+    taken_emails = {row.email for row in existing}
+
+    accepted = []
+    for line_number, record in chunk:
+        if record.username in taken_usernames:
+            reason = "username already exists"
+        elif record.email in taken_emails:
+            reason = "email already exists"
+        else:
+            # later duplicates inside the same file conflict too
+            taken_usernames.add(record.username)
+            taken_emails.add(record.email)
+            accepted.append((line_number, record))
+            continue
+        report.conflicts.append(
+            {
+                "line": line_number,
+                "username": record.username,
+                "reason": reason,
+            }
+        )
+    return accepted
+
+
+def _row(record: UserImportRecord) -> dict:
+    return {
+        "username": record.username,
+        "email": record.email,
+        "hashed_password": record.hashed_password,
+        "role": record.role,
+    }
+
+
+def _insert_chunk(
+    session: Session,
+    chunk: list[tuple[int, UserImportRecord]],
+    report: ImportReport,
+):
+    try:
+        session.execute(insert(User), [_row(r) for _, r in chunk])
+        session.commit()
+        report.created += len(chunk)
+        return
+    except IntegrityError:
+        # a concurrent writer took some of the names after our check,
+        # fall back to per-row savepoints for this chunk only
+        session.rollback()
+    for line_number, record in chunk:
+        try:
+            with session.begin_nested():
+                session.execute(insert(User), [_row(record)])
+        except IntegrityError:
+            report.conflicts.append(
+                {
+                    "line": line_number,
+                    "username": record.username,
+                    "reason": "username or email already exists",
+                }
+            )
+        else:
+            report.created += 1
+    session.commit()
+
+
+def import_users(
+    session: Session,
+    lines: Iterable[str | bytes],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    executor: Executor | None = None,
+) -> ImportReport:
+    report = ImportReport()
+    start = time.perf_counter()
+    for chunk in _chunked(parse_ndjson(lines, report), chunk_size):
+        chunk = _drop_conflicts(session, chunk, report)
+        if not chunk:
+            continue
+        _hash_chunk(chunk, executor)
+        _insert_chunk(session, chunk, report)
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def import_users_parallel(
+    session: Session,
+    lines: Iterable[str | bytes],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
+) -> ImportReport:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return import_users(session, lines, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return import_users(session, lines, chunk_size, executor)
+
+
+def create_import_executor(
+    workers: int = IMPORT_WORKERS,
+) -> ProcessPoolExecutor | None:
+    """Pool the API hashes imported passwords on, None for no pool."""
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers)
+
+
+def main(argv: list[str] | None = None):
+    from sqlalchemy.orm import sessionmaker
+
+    from db import get_engine
+    from models import Base
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="NDJSON file, '-' for stdin")
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="hashing processes (default: number of CPUs)",
+    )
+    args = parser.parse_args(argv)
+
+    engine = get_engine()
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    source = sys.stdin if args.path == "-" else open(args.path, "rb")
+    try:
+        report = import_users_parallel(
+            session, source, args.chunk_size, args.workers
+        )
+    finally:
+        session.close()
+        if source is not sys.stdin:
+            source.close()
+    json.dump(report.as_dict(), sys.stdout, indent=2)
+    print()
+
+
+if __name__ == "__main__":
+    main()
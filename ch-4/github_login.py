@@ -1,12 +1,14 @@
 import httpx
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
 
 from security import Token
 from third_party_login import (
+    GITHUB_ACCESS_TOKEN_URL,
     GITHUB_AUTHORIZATION_URL,
     GITHUB_CLIENT_ID,
     GITHUB_CLIENT_SECRET,
     GITHUB_REDIRECT_URI,
+    get_github_client,
 )
 
 router = APIRouter()
@@ -18,17 +20,26 @@ def github_login():
     }
 
 @router.get("/github/auth/token", response_model=Token, responses={})
-async def github_callback(code: str):
-    token_response = httpx.post(
-        "https://github.com/login/oauth/access_token",
-        data={
-            "client_id": GITHUB_CLIENT_ID,
-            "client_secret": GITHUB_CLIENT_SECRET,
-            "code": code,
-            "redirect_uri": GITHUB_REDIRECT_URI,
-        },
-        headers={"Accept": "application/json"},
-    ).json()
+async def github_callback(
+    code: str,
+    client: httpx.AsyncClient = Depends(get_github_client),
+):
+    try:
+        response = await client.post(
+            GITHUB_ACCESS_TOKEN_URL,
+            data={
+                "client_id": GITHUB_CLIENT_ID,
+                "client_secret": GITHUB_CLIENT_SECRET,
+                "code": code,
+                "redirect_uri": GITHUB_REDIRECT_URI,
+            },
+        )
+    except httpx.HTTPError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="GitHub is not reachable",
+        )
+    token_response = response.json() if response.is_success else {}
 
     access_token = token_response.get("access_token")
 
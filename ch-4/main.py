@@ -8,36 +8,51 @@ from fastapi import (
 )
 from sqlalchemy.orm import Session
 
+import admin
 import mfa
 import security
 import premium_access
 import rbac
 import github_login
+from bulk_import import create_import_executor
 from db import get_engine, get_session
 from models import Base
 from operations import add_user
+from rate_limit import RateLimitMiddleware, create_rate_limit_store
 from schemas import (
     ResponseCreateUser,
     UserCreateBody,
     UserCreateResponse,
 )
-from third_party_login import resolve_github_token  
+from third_party_login import (
+    create_github_client,
+    resolve_github_token,
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=get_engine())
+    app.state.github_client = create_github_client()
+    app.state.import_executor = create_import_executor()
     yield
+    await app.state.github_client.aclose()
+    if app.state.import_executor is not None:
+        app.state.import_executor.shutdown(cancel_futures=True)
 
 
 app = FastAPI(
     title="Saas application", lifespan=lifespan
 )
 
+rate_limit_store = create_rate_limit_store()
+app.add_middleware(RateLimitMiddleware, store=rate_limit_store)
+
 app.include_router(security.router)
 app.include_router(premium_access.router)
 app.include_router(rbac.router)
 app.include_router(github_login.router)
 app.include_router(mfa.router)
+app.include_router(admin.router)
 #app.include_router(user_session.router)
 #app.include_router(api_key.router)
 
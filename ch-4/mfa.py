@@ -1,3 +1,9 @@
+import os
+import secrets
+import threading
+import time
+from collections import deque
+
 import pyotp
 from fastapi import (
     APIRouter,
@@ -9,11 +15,166 @@ from sqlalchemy.orm import Session
 
 from db import get_session
 from operations import get_user
-from rbac import get_current_user
-from schemas import UserCreateResponse
+from rbac import Permission, Principal, require_permissions
+
+MFA_MAX_ATTEMPTS = int(os.getenv("MFA_MAX_ATTEMPTS", "5"))
+MFA_ATTEMPT_WINDOW = float(os.getenv("MFA_ATTEMPT_WINDOW", "60"))
+MFA_REDIS_URL = os.getenv("MFA_REDIS_URL")
+# a code is accepted during one step only, so remembering it
+# for two steps covers clock drift at the step boundary
+TOTP_INTERVAL = 30
+USED_CODE_TTL = 2 * TOTP_INTERVAL
 
 router = APIRouter()
 
+
+class MemoryMFAStore:
+    """Per-process attempt windows and used-code set."""
+
+    SWEEP_EVERY = 1024
+
+    def __init__(self, max_attempts: int, window: float):
+        self.max_attempts = max_attempts
+        self.window = window
+        self._attempts: dict[str, deque[float]] = {}
+        self._used_codes: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._calls = 0
+
+    def hit(self, key: str) -> float:
+        """Record an attempt, return 0 if allowed else seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            self._maybe_sweep(now)
+            attempts = self._attempts.setdefault(key, deque())
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+            if len(attempts) >= self.max_attempts:
+                return attempts[0] + self.window - now
+            attempts.append(now)
+            return 0
+
+    def reset(self, key: str):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+    def mark_used(self, key: str, ttl: float) -> bool:
+        """Return False if the key was already marked and not expired."""
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._used_codes.get(key)
+            if expires_at is not None and expires_at > now:
+                return False
+            self._used_codes[key] = now + ttl
+            return True
+
+    def _maybe_sweep(self, now: float):
+        # drop idle keys so sprayed usernames don't pile up forever
+        self._calls += 1
+        if self._calls % self.SWEEP_EVERY:
+            return
+        self._attempts = {
+            key: attempts
+            for key, attempts in self._attempts.items()
+            if attempts and attempts[-1] > now - self.window
+        }
+        self._used_codes = {
+            key: expires_at
+            for key, expires_at in self._used_codes.items()
+            if expires_at > now
+        }
+
+    def clear(self):
+        with self._lock:
+            self._attempts.clear()
+            self._used_codes.clear()
+
+
+class RedisMFAStore:
+    """Same interface as MemoryMFAStore, shared across workers."""
+
+    # trim, check and record in one call, so concurrent attempts from
+    # several workers cannot all pass the limit
+    HIT_SCRIPT = """
+    local now = tonumber(ARGV[1])
+    local window = tonumber(ARGV[2])
+    local max_attempts = tonumber(ARGV[3])
+    redis.call("ZREMRANGEBYSCORE", KEYS[1], 0, now - window)
+    if redis.call("ZCARD", KEYS[1]) >= max_attempts then
+        local oldest = redis.call("ZRANGE", KEYS[1], 0, 0, "WITHSCORES")
+        return tostring(tonumber(oldest[2]) + window - now)
+    end
+    redis.call("ZADD", KEYS[1], now, ARGV[4])
+    redis.call("EXPIRE", KEYS[1], math.ceil(window) + 1)
+    return "0"
+    """
+
+    def __init__(self, client, max_attempts: int, window: float):
+        self.client = client
+        self.max_attempts = max_attempts
+        self.window = window
+        self._hit = client.register_script(self.HIT_SCRIPT)
+
+    def hit(self, key: str) -> float:
+        wait = self._hit(
+            keys=[f"mfa:attempts:{key}"],
+            # a unique member, attempts in the same instant all count
+            args=[time.time(), self.window, self.max_attempts,
+                  secrets.token_hex(8)],
+        )
+        return float(wait)
+
+    def reset(self, key: str):
+        self.client.delete(f"mfa:attempts:{key}")
+
+    def mark_used(self, key: str, ttl: float) -> bool:
+        return bool(
+            self.client.set(f"mfa:used:{key}", 1, nx=True, ex=int(ttl))
+        )
+
+    def clear(self):
+        pass
+
+
+class TOTPCache:
+    """username -> pyotp.TOTP, kept for one TOTP step."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: dict[str, tuple[float, pyotp.TOTP]] = {}
+
+    def get(self, username: str) -> pyotp.TOTP | None:
+        entry = self._entries.get(username)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, username: str, totp: pyotp.TOTP):
+        self._entries[username] = (time.monotonic() + self.ttl, totp)
+
+    def invalidate(self, username: str):
+        self._entries.pop(username, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+def create_mfa_store():
+    if MFA_REDIS_URL:
+        import redis
+
+        return RedisMFAStore(
+            redis.Redis.from_url(MFA_REDIS_URL),
+            MFA_MAX_ATTEMPTS,
+            MFA_ATTEMPT_WINDOW,
+        )
+    return MemoryMFAStore(MFA_MAX_ATTEMPTS, MFA_ATTEMPT_WINDOW)
+
+
+mfa_store = create_mfa_store()
+totp_cache = TOTPCache(ttl=TOTP_INTERVAL)
+
+
 def generate_totp_secret():
     return pyotp.random_base32()
 
@@ -25,7 +186,7 @@ def generate_totp_uri(secret, user_email):
 
 @router.post("/user/enable-mfa")
 def enable_mfa(
-    user: UserCreateResponse = Depends(get_current_user),
+    user: Principal = Depends(require_permissions(Permission.MANAGE_MFA)),
     session: Session = Depends(get_session),
 ):
     secret = generate_totp_secret()
@@ -33,26 +194,62 @@ def enable_mfa(
     user.totp_secret = secret
     session.add(user)
     session.commit()
+    totp_cache.invalidate(user.username)
     totp_uri = generate_totp_uri(secret, user.username)
 
     return {"totp_uri": totp_uri, "secret-numbers": secret}
 
-@router.post("/verify-totp")
+
+def get_user_totp(session: Session, username: str) -> pyotp.TOTP | None:
+    totp = totp_cache.get(username)
+    if totp is not None:
+        return totp
+    user = get_user(session=session, username_or_email=username)
+    if not user or not user.totp_secret:
+        return None
+    totp = pyotp.TOTP(user.totp_secret, interval=TOTP_INTERVAL)
+    totp_cache.set(username, totp)
+    return totp
+
+
+@router.post(
+    "/verify-totp",
+    responses={
+        status.HTTP_429_TOO_MANY_REQUESTS: {
+            "description": "Too many attempts"
+        }
+    },
+)
 def verify_totp(
     code: str,
     username: str,
     session: Session = Depends(get_session),
 ):
-    user = get_user(session=session, username_or_email=username)
-    if not user.totp_secret:
+    # everything before get_user_totp is rejected without touching the DB
+    retry_after = mfa_store.hit(username)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(max(1, round(retry_after)))},
+        )
+    if not code.isdigit():
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token is not valid!",
+        )
+    totp = get_user_totp(session=session, username=username)
+    if totp is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Token is not valid!",
         )
-    totp = pyotp.TOTP(user.totp_secret)
-    if not totp.verify(code):
+    if not totp.verify(code) or not mfa_store.mark_used(
+        f"{username}:{code}", USED_CODE_TTL
+    ):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token is not valid!",
         )
-    return {"message": "Token verified successfully!"}
\ No newline at end of file
+    mfa_store.reset(username)
+    return {"message": "Token verified successfully!"}
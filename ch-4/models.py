@@ -14,6 +14,7 @@ class Base(DeclarativeBase):
 class Role(str, Enum):
     basic = "basic"
     premium = "premium"
+    admin = "admin"
 
 
 class User(Base):
@@ -40,11 +40,16 @@ def add_user(
 def get_user(
     session: Session, username_or_email: str
 ) -> User | None:
-    try:
-        validate_email(username_or_email)
-        query_filter = User.email
-    except EmailNotValidError:
-        query_filter = User.username
+    query_filter = User.username
+    # skip the email validator for plain usernames, the common case
+    if "@" in username_or_email:
+        try:
+            validate_email(
+                username_or_email, check_deliverability=False
+            )
+            query_filter = User.email
+        except EmailNotValidError:
+            pass
     user = (
         session.query(User)
         .filter(query_filter == username_or_email)
@@ -0,0 +1,333 @@
+"""Token bucket rate limiting for the unauthenticated, bcrypt-heavy routes.
+
+Each route can be limited per client IP and per username. Buckets live in
+an in-process store by default, or in Redis when RATE_LIMIT_REDIS_URL is
+set so several workers share the same budget.
+"""
+import json
+import math
+import os
+import time
+from array import array
+from dataclasses import dataclass
+from urllib.parse import parse_qs
+
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+# only the tiny login/register bodies are ever buffered
+MAX_BUFFERED_BODY = 64 * 1024
+
+
+@dataclass(frozen=True, slots=True)
+class Rate:
+    per_second: float
+    burst: int
+
+    @classmethod
+    def per_minute(cls, count: int, burst: int | None = None) -> "Rate":
+        return cls(per_second=count / 60, burst=burst or count)
+
+
+@dataclass(frozen=True, slots=True)
+class RouteRateLimit:
+    method: str
+    path: str
+    per_ip: Rate | None = None
+    per_username: Rate | None = None
+    # where the username lives: "form", "json" or "query"
+    username_from: str | None = None
+
+
+DEFAULT_RULES = (
+    RouteRateLimit(
+        "POST",
+        "/token",
+        per_ip=Rate.per_minute(30, burst=10),
+        per_username=Rate.per_minute(10, burst=5),
+        username_from="form",
+    ),
+    RouteRateLimit(
+        "POST",
+        "/register/user",
+        per_ip=Rate.per_minute(10, burst=5),
+        per_username=Rate.per_minute(5, burst=3),
+        username_from="json",
+    ),
+    RouteRateLimit(
+        "POST",
+        "/register/premium-user",
+        per_ip=Rate.per_minute(10, burst=5),
+        per_username=Rate.per_minute(5, burst=3),
+        username_from="json",
+    ),
+    RouteRateLimit(
+        "POST",
+        "/verify-totp",
+        per_ip=Rate.per_minute(30, burst=10),
+        per_username=Rate.per_minute(10, burst=10),
+        username_from="query",
+    ),
+)
+
+
+class MemoryTokenBucketStore:
+    """Buckets packed in parallel float arrays, indexed by slot.
+
+    A bucket that has refilled to its burst size is indistinguishable from
+    a missing one, so its slot is recycled. Slots are tracked on a timing
+    wheel keyed by the moment they become full, which keeps expiry O(1)
+    per request instead of scanning every key.
+    """
+
+    def __init__(self, tick: float = 1.0, wheel_size: int = 512):
+        self.tick = tick
+        self._slots: dict[str, int] = {}
+        self._keys: list[str | None] = []
+        self._tokens = array("d")
+        self._updated = array("d")
+        self._full_at = array("d")
+        self._rate = array("d")
+        self._burst = array("d")
+        self._free: list[int] = []
+        self._wheel: list[list[int]] = [[] for _ in range(wheel_size)]
+        # seeded from the first ``now`` seen, so the wheel runs on the
+        # caller's clock rather than on time.monotonic()
+        self._wheel_pos: int | None = None
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    async def consume(self, key: str, rate: Rate) -> float:
+        """Take one token, return 0 if allowed else seconds to wait."""
+        return self.consume_sync(key, rate, time.monotonic())
+
+    def consume_sync(self, key: str, rate: Rate, now: float) -> float:
+        self._expire(now)
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._allocate(key, rate, now)
+            tokens = float(rate.burst)
+        else:
+            elapsed = now - self._updated[slot]
+            tokens = min(
+                self._burst[slot],
+                self._tokens[slot] + elapsed * self._rate[slot],
+            )
+        self._updated[slot] = now
+        if tokens < 1:
+            self._tokens[slot] = tokens
+            return (1 - tokens) / self._rate[slot]
+        tokens -= 1
+        self._tokens[slot] = tokens
+        self._full_at[slot] = now + (
+            (self._burst[slot] - tokens) / self._rate[slot]
+        )
+        return 0
+
+    def _allocate(self, key: str, rate: Rate, now: float) -> int:
+        if self._free:
+            slot = self._free.pop()
+            self._keys[slot] = key
+            self._rate[slot] = rate.per_second
+            self._burst[slot] = rate.burst
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            for column in (self._tokens, self._updated, self._full_at):
+                column.append(0.0)
+            self._rate.append(rate.per_second)
+            self._burst.append(rate.burst)
+        self._slots[key] = slot
+        self._full_at[slot] = now + 1 / rate.per_second
+        self._schedule(slot)
+        return slot
+
+    def _schedule(self, slot: int):
+        # never file a slot under a position the wheel already passed
+        position = max(
+            int(self._full_at[slot] // self.tick), self._wheel_pos + 1
+        )
+        self._wheel[position % len(self._wheel)].append(slot)
+
+    def _expire(self, now: float):
+        current = int(now // self.tick)
+        if self._wheel_pos is None:
+            self._wheel_pos = current
+            return
+        if current <= self._wheel_pos:
+            return
+        # after a long idle period one turn of the wheel sees everything
+        start = max(self._wheel_pos + 1, current - len(self._wheel) + 1)
+        self._wheel_pos = current
+        for position in range(start, current + 1):
+            bucket = self._wheel[position % len(self._wheel)]
+            if not bucket:
+                continue
+            self._wheel[position % len(self._wheel)] = []
+            for slot in bucket:
+                key = self._keys[slot]
+                if key is None:
+                    continue
+                if self._full_at[slot] <= now:
+                    del self._slots[key]
+                    self._keys[slot] = None
+                    self._free.append(slot)
+                else:
+                    self._schedule(slot)
+
+    def clear(self):
+        self._slots.clear()
+        self._keys.clear()
+        self._free.clear()
+        for column in (
+            self._tokens, self._updated, self._full_at,
+            self._rate, self._burst,
+        ):
+            del column[:]
+        for bucket in self._wheel:
+            bucket.clear()
+        self._wheel_pos = None
+
+
+class RedisTokenBucketStore:
+    """Token buckets kept in Redis hashes, updated by one Lua call."""
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+    local tokens = tonumber(bucket[1]) or burst
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + (now - updated) * rate)
+    local wait = 0
+    if tokens < 1 then
+        wait = (1 - tokens) / rate
+    else
+        tokens = tokens - 1
+    end
+    redis.call("HSET", KEYS[1], "tokens", tokens, "updated", now)
+    redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(self.SCRIPT)
+
+    async def consume(self, key: str, rate: Rate) -> float:
+        wait = await self._script(
+            keys=[f"ratelimit:{key}"],
+            args=[rate.per_second, rate.burst, time.time()],
+        )
+        return float(wait)
+
+    def clear(self):
+        pass
+
+
+def create_rate_limit_store():
+    if RATE_LIMIT_REDIS_URL:
+        from redis import asyncio as aioredis
+
+        return RedisTokenBucketStore(
+            aioredis.from_url(RATE_LIMIT_REDIS_URL)
+        )
+    return MemoryTokenBucketStore()
+
+
+async def _read_body(receive) -> tuple[bytes, list[dict]]:
+    chunks, messages, size = [], [], 0
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        size += len(chunks[-1])
+        if not message.get("more_body") or size > MAX_BUFFERED_BODY:
+            break
+    return b"".join(chunks), messages
+
+
+def _username(rule: RouteRateLimit, scope, body: bytes) -> str | None:
+    if rule.username_from == "query":
+        values = parse_qs(scope["query_string"].decode()).get("username")
+        return values[0] if values else None
+    if rule.username_from == "form":
+        values = parse_qs(body.decode(errors="ignore")).get("username")
+        return values[0] if values else None
+    if rule.username_from == "json":
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return None
+        if isinstance(payload, dict) and isinstance(
+            payload.get("username"), str
+        ):
+            return payload["username"]
+    return None
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, rules=DEFAULT_RULES, store=None):
+        self.app = app
+        self.rules = {(rule.method, rule.path): rule for rule in rules}
+        self.store = store if store is not None else create_rate_limit_store()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        rule = self.rules.get((scope["method"], scope["path"]))
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        if rule.per_ip:
+            client = scope.get("client")
+            ip = client[0] if client else "unknown"
+            wait = await self.store.consume(
+                f"ip:{rule.path}:{ip}", rule.per_ip
+            )
+            if wait:
+                return await self._reject(send, wait)
+
+        if rule.per_username:
+            body, messages = b"", []
+            if rule.username_from in ("form", "json"):
+                body, messages = await _read_body(receive)
+                receive = self._replay(messages, receive)
+            username = _username(rule, scope, body)
+            if username:
+                wait = await self.store.consume(
+                    f"user:{rule.path}:{username}", rule.per_username
+                )
+                if wait:
+                    return await self._reject(send, wait)
+
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    def _replay(messages: list[dict], receive):
+        pending = list(messages)
+
+        async def replay():
+            if pending:
+                return pending.pop(0)
+            return await receive()
+
+        return replay
+
+    @staticmethod
+    async def _reject(send, wait: float):
+        body = b'{"detail":"Too many requests"}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(math.ceil(wait)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -1,12 +1,16 @@
+from dataclasses import dataclass
+from enum import IntFlag, auto
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Annotated
 
 from fastapi import (
     APIRouter,
     Depends,
     HTTPException,
+    Request,
     status,
 )
-from pydantic import BaseModel, EmailStr
 from sqlalchemy.orm import Session
 
 from db import get_session
@@ -15,35 +19,87 @@ from security import decode_access_token, oauth2_scheme
 
 router = APIRouter()
 
-class UserCreateRequestWithRole(BaseModel):
+
+class Permission(IntFlag):
+    READ_CONTENT = auto()
+    MANAGE_MFA = auto()
+    READ_PREMIUM_CONTENT = auto()
+    IMPORT_USERS = auto()
+
+
+_BASIC = Permission.READ_CONTENT | Permission.MANAGE_MFA
+_PREMIUM = _BASIC | Permission.READ_PREMIUM_CONTENT
+_ADMIN = _PREMIUM | Permission.IMPORT_USERS
+
+# resolved once at import, roles map to a single int per request
+ROLE_PERMISSIONS = MappingProxyType(
+    {
+        Role.basic: _BASIC,
+        Role.premium: _PREMIUM,
+        Role.admin: _ADMIN,
+    }
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
     username: str
-    email: EmailStr
-    role: Role = Role.basic
+    email: str
+    role: Role
+    permissions: Permission
+
+    def has(self, required: Permission) -> bool:
+        return self.permissions & required == required
+
 
-def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], 
-                    session: Session = Depends(get_session)) -> UserCreateRequestWithRole:
+def get_current_user(request: Request,
+                    token: Annotated[str, Depends(oauth2_scheme)],
+                    session: Session = Depends(get_session)) -> Principal:
     user = decode_access_token(token=token, session=session)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User is not authorized!",
         )
-    return UserCreateRequestWithRole(
-        username=user.username, email=user.email, role=user.role
+    # the email comes from our own table, it was validated on the way in
+    principal = Principal(
+        username=user.username,
+        email=user.email,
+        role=user.role,
+        permissions=ROLE_PERMISSIONS[user.role],
     )
+    request.state.principal = principal
+    return principal
 
-def get_premium_user(current_user: Annotated[get_current_user, Depends()]):
-    if current_user.role != Role.premium:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User is not authorized!",
-        )
-    return current_user
+
+@lru_cache
+def require_permissions(required: Permission):
+    # cached so every route asking for the same permissions shares one
+    # dependency callable, and FastAPI resolves it once per request
+    def check_permissions(
+        current_user: Annotated[Principal, Depends(get_current_user)],
+    ) -> Principal:
+        if not current_user.has(required):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="User is not authorized!",
+            )
+        return current_user
+
+    return check_permissions
+
+
+get_premium_user = require_permissions(Permission.READ_PREMIUM_CONTENT)
+get_admin_user = require_permissions(Permission.IMPORT_USERS)
 
 @router.get("/welcome/all-users",responses={})
-def all_users_can_access(user: Annotated[get_current_user, Depends()]):
+def all_users_can_access(
+    user: Annotated[
+        Principal, Depends(require_permissions(Permission.READ_CONTENT))
+    ],
+):
     return f"Welcome {user.username}, welcome to your space!"
 
 @router.get("/welcome/premium-users",responses={})
-def only_premium_users_can_access(user: Annotated[get_current_user, Depends(get_premium_user)]):
-    return f"Welcome {user.username}, welcome to your premium space!"
\ No newline at end of file
+def only_premium_users_can_access(user: Annotated[Principal, Depends(get_premium_user)]):
+    return f"Welcome {user.username}, welcome to your premium space!"
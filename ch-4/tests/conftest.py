@@ -0,0 +1,45 @@
+import os
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from db import get_session
+from main import app, rate_limit_store
+from models import Base
+
+engine = create_engine("sqlite:///:memory:",
+                        connect_args={"check_same_thread": False},
+                        poolclass=StaticPool)
+
+Base.metadata.create_all(bind=engine)
+
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def test_db_session():
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        for table in reversed(Base.metadata.sorted_tables):
+            db.execute(table.delete())
+        db.commit()
+        db.close()
+
+@pytest.fixture(scope="function")
+def test_client(test_db_session):
+    app.dependency_overrides[get_session] = (lambda: test_db_session)
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    rate_limit_store.clear()
@@ -0,0 +1,159 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import admin
+from bulk_import import import_users
+from models import Role, User
+from operations import add_user, pwd_context
+
+
+def ndjson(*records):
+    return [json.dumps(record) for record in records]
+
+
+def test_import_users_reports_conflicts_and_invalid_lines(test_db_session):
+    add_user(
+        session=test_db_session,
+        username="taken",
+        password="secret",
+        email="taken@example.com",
+    )
+    prehashed = pwd_context.hash("prehashed")
+    lines = ndjson(
+        {"username": "alice", "email": "alice@example.com", "password": "a"},
+        {
+            "username": "bob",
+            "email": "bob@example.com",
+            "hashed_password": prehashed,
+            "role": "premium",
+        },
+        {"username": "taken", "email": "new@example.com", "password": "x"},
+        {"username": "alice2", "email": "alice@example.com", "password": "x"},
+        {"username": "nopass", "email": "nopass@example.com"},
+    )
+    lines.insert(2, "")
+
+    report = import_users(test_db_session, lines, chunk_size=2)
+
+    assert report.created == 2
+    assert [c["line"] for c in report.conflicts] == [4, 5]
+    assert report.conflicts[0]["reason"] == "username already exists"
+    assert report.conflicts[1]["reason"] == "email already exists"
+    assert [i["line"] for i in report.invalid] == [6]
+
+    bob = test_db_session.query(User).filter(User.username == "bob").one()
+    assert bob.hashed_password == prehashed
+    assert bob.role == Role.premium
+    alice = test_db_session.query(User).filter(User.username == "alice").one()
+    assert pwd_context.verify("a", alice.hashed_password)
+
+
+def test_import_users_hashes_in_worker_processes(test_db_session):
+    lines = ndjson(
+        *(
+            {"username": f"u{n}", "email": f"u{n}@example.com", "password": f"p{n}"}
+            for n in range(4)
+        )
+    )
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        report = import_users(test_db_session, lines, executor=executor)
+    assert report.created == 4
+    user = test_db_session.query(User).filter(User.username == "u3").one()
+    assert pwd_context.verify("p3", user.hashed_password)
+
+
+def test_import_endpoint_requires_admin(test_client, test_db_session):
+    for username, role in (("admin", Role.admin), ("basic", Role.basic)):
+        add_user(
+            session=test_db_session,
+            username=username,
+            password="secret",
+            email=f"{username}@example.com",
+            role=role,
+        )
+    body = "\n".join(
+        ndjson({"username": "carol", "email": "carol@example.com", "password": "c"})
+    )
+
+    token = test_client.post(
+        "/token", data={"username": "basic", "password": "secret"}
+    ).json()["access_token"]
+    response = test_client.post(
+        "/admin/users/import",
+        content=body,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 403
+
+    token = test_client.post(
+        "/token", data={"username": "admin", "password": "secret"}
+    ).json()["access_token"]
+    response = test_client.post(
+        "/admin/users/import",
+        content=body,
+        headers={
+            "Authorization": f"Bearer {token}",
+            "Content-Type": "application/x-ndjson",
+        },
+    )
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
+    assert response.json()["conflicts"] == []
+
+
+def admin_headers(test_client, test_db_session) -> dict:
+    add_user(
+        session=test_db_session,
+        username="admin",
+        password="secret",
+        email="admin@example.com",
+        role=Role.admin,
+    )
+    token = test_client.post(
+        "/token", data={"username": "admin", "password": "secret"}
+    ).json()["access_token"]
+    return {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/x-ndjson",
+    }
+
+
+def test_import_endpoint_streams_the_body(test_client, test_db_session):
+    headers = admin_headers(test_client, test_db_session)
+    body = "\n".join(
+        ndjson(*(
+            {"username": f"s{i}", "email": f"s{i}@example.com",
+             "password": "p"}
+            for i in range(5)
+        ))
+    ).encode()
+
+    def chunks():
+        # split mid-line to check lines are reassembled
+        for start in range(0, len(body), 7):
+            yield body[start:start + 7]
+
+    response = test_client.post(
+        "/admin/users/import", content=chunks(), headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json()["created"] == 5
+
+
+def test_import_endpoint_rejects_large_bodies(
+    test_client, test_db_session, monkeypatch
+):
+    headers = admin_headers(test_client, test_db_session)
+    monkeypatch.setattr(admin, "IMPORT_MAX_BODY_BYTES", 10)
+    body = b'{"username": "too-long"}\n'
+
+    response = test_client.post(
+        "/admin/users/import", content=body, headers=headers
+    )
+    assert response.status_code == 413
+
+    # no Content-Length when chunked, caught while streaming
+    response = test_client.post(
+        "/admin/users/import", content=iter([body]), headers=headers
+    )
+    assert response.status_code == 413
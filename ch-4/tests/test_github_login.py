@@ -0,0 +1,73 @@
+import httpx
+import pytest
+
+from main import app
+from operations import add_user
+from third_party_login import (
+    create_github_client,
+    get_github_client,
+    github_user_cache,
+)
+
+
+@pytest.fixture
+def github_calls():
+    return []
+
+
+@pytest.fixture
+def github_client(test_client, github_calls):
+    def handler(request: httpx.Request) -> httpx.Response:
+        github_calls.append(request)
+        if request.url.path == "/login/oauth/access_token":
+            return httpx.Response(
+                200, json={"access_token": "gho_abc", "token_type": "bearer"}
+            )
+        if request.headers["Authorization"] == "Bearer gho_abc":
+            return httpx.Response(
+                200, json={"login": "octocat", "email": "octo@cat.com"}
+            )
+        return httpx.Response(401, json={"message": "Bad credentials"})
+
+    client = create_github_client(transport=httpx.MockTransport(handler))
+    app.dependency_overrides[get_github_client] = lambda: client
+    github_user_cache.clear()
+    yield client
+    github_user_cache.clear()
+
+
+def test_github_callback_returns_token(test_client, github_client):
+    response = test_client.get("/github/auth/token", params={"code": "123"})
+    assert response.status_code == 200
+    assert response.json() == {
+        "access_token": "gho_abc", "token_type": "bearer"
+    }
+
+
+def test_home_queries_github_once_per_token(
+    test_client, test_db_session, github_client, github_calls
+):
+    add_user(
+        session=test_db_session,
+        username="octocat",
+        password="secret",
+        email="octo@cat.com",
+    )
+    headers = {"Authorization": "Bearer gho_abc"}
+    for _ in range(3):
+        response = test_client.get("/home", headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {"message": "logged in octocat !"}
+    assert len(github_calls) == 1
+
+
+def test_home_rejects_invalid_token(test_client, github_client, github_calls):
+    response = test_client.get(
+        "/home", headers={"Authorization": "Bearer wrong"}
+    )
+    assert response.status_code == 403
+    response = test_client.get(
+        "/home", headers={"Authorization": "Bearer wrong"}
+    )
+    assert response.status_code == 403
+    assert len(github_calls) == 2
@@ -0,0 +1,74 @@
+import pyotp
+import pytest
+from sqlalchemy import event
+
+from mfa import MFA_MAX_ATTEMPTS, mfa_store, totp_cache
+from operations import add_user
+
+
+@pytest.fixture
+def totp_secret(test_db_session):
+    mfa_store.clear()
+    totp_cache.clear()
+    user = add_user(
+        session=test_db_session,
+        username="mfa-user",
+        password="secret",
+        email="mfa@example.com",
+    )
+    secret = pyotp.random_base32()
+    user.totp_secret = secret
+    test_db_session.commit()
+    yield secret
+    mfa_store.clear()
+    totp_cache.clear()
+
+
+@pytest.fixture
+def db_queries(test_db_session):
+    engine = test_db_session.get_bind()
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def test_verify_totp_rejects_replayed_code(test_client, totp_secret):
+    code = pyotp.TOTP(totp_secret).now()
+    params = {"code": code, "username": "mfa-user"}
+
+    response = test_client.post("/verify-totp", params=params)
+    assert response.status_code == 200
+
+    response = test_client.post("/verify-totp", params=params)
+    assert response.status_code == 401
+
+
+def test_verify_totp_rate_limits_before_db(
+    test_client, totp_secret, db_queries
+):
+    params = {"code": "000000", "username": "mfa-user"}
+    if pyotp.TOTP(totp_secret).verify("000000"):
+        params["code"] = "000001"
+
+    for _ in range(MFA_MAX_ATTEMPTS):
+        response = test_client.post("/verify-totp", params=params)
+        assert response.status_code == 401
+    # the secret is cached after the first lookup
+    assert len(db_queries) == 1
+
+    response = test_client.post("/verify-totp", params=params)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert len(db_queries) == 1
+
+
+def test_verify_totp_unknown_user(test_client, totp_secret):
+    response = test_client.post(
+        "/verify-totp", params={"code": "123456", "username": "ghost"}
+    )
+    assert response.status_code == 400
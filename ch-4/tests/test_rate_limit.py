@@ -0,0 +1,54 @@
+from rate_limit import DEFAULT_RULES, MemoryTokenBucketStore, Rate
+
+
+def test_bucket_refills_and_recycles_idle_slots():
+    store = MemoryTokenBucketStore(tick=1.0, wheel_size=8)
+    rate = Rate(per_second=1, burst=2)
+    now = 1000.0
+
+    assert store.consume_sync("a", rate, now) == 0
+    assert store.consume_sync("a", rate, now) == 0
+    assert store.consume_sync("a", rate, now) == 1.0
+    assert store.consume_sync("a", rate, now + 1) == 0
+    assert len(store) == 1
+
+    # once refilled to burst the slot is handed back to the free list
+    assert store.consume_sync("b", rate, now + 10) == 0
+    assert len(store) == 1
+    assert store.consume_sync("c", rate, now + 10) == 0
+    assert len(store._keys) == 2
+
+
+def test_token_route_is_limited_per_username(test_client):
+    token_rule = next(r for r in DEFAULT_RULES if r.path == "/token")
+    data = {"username": "someone", "password": "wrong"}
+
+    for _ in range(token_rule.per_username.burst):
+        response = test_client.post("/token", data=data)
+        assert response.status_code == 401
+
+    response = test_client.post("/token", data=data)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    # other usernames keep their own bucket
+    response = test_client.post(
+        "/token", data={"username": "other", "password": "wrong"}
+    )
+    assert response.status_code == 401
+
+
+def test_register_is_limited_per_ip(test_client):
+    register_rule = next(
+        r for r in DEFAULT_RULES if r.path == "/register/user"
+    )
+    statuses = [
+        test_client.post(
+            "/register/user",
+            json={"username": f"user{n}", "email": f"u{n}@example.com",
+                  "password": "secret"},
+        ).status_code
+        for n in range(register_rule.per_ip.burst + 1)
+    ]
+    assert statuses[:-1] == [201] * register_rule.per_ip.burst
+    assert statuses[-1] == 429
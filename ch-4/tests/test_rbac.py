@@ -0,0 +1,44 @@
+import pytest
+
+from models import Role
+from operations import add_user
+from rbac import ROLE_PERMISSIONS, Permission
+
+
+def login(test_client, test_db_session, role: Role) -> dict:
+    add_user(
+        session=test_db_session,
+        username=role.value,
+        password="secret",
+        email=f"{role.value}@example.com",
+        role=role,
+    )
+    token = test_client.post(
+        "/token", data={"username": role.value, "password": "secret"}
+    ).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_role_permissions_are_cumulative():
+    assert ROLE_PERMISSIONS[Role.basic] & Permission.READ_CONTENT
+    assert not ROLE_PERMISSIONS[Role.basic] & Permission.READ_PREMIUM_CONTENT
+    assert ROLE_PERMISSIONS[Role.premium] & Permission.READ_PREMIUM_CONTENT
+    assert ROLE_PERMISSIONS[Role.admin] == (
+        ROLE_PERMISSIONS[Role.premium] | Permission.IMPORT_USERS
+    )
+
+
+@pytest.mark.parametrize(
+    "role, expected_status",
+    [(Role.basic, 403), (Role.premium, 200), (Role.admin, 200)],
+)
+def test_premium_space_requires_permission(
+    test_client, test_db_session, role, expected_status
+):
+    headers = login(test_client, test_db_session, role)
+
+    response = test_client.get("/welcome/all-users", headers=headers)
+    assert response.status_code == 200
+
+    response = test_client.get("/welcome/premium-users", headers=headers)
+    assert response.status_code == expected_status
@@ -1,7 +1,11 @@
+import hashlib
 import os
+import time
+from collections import OrderedDict
+
 import httpx
-from fastapi import Depends, HTTPException
-from fastapi.security import OAuth2     
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2
 from sqlalchemy.orm import Session
 
 from db import get_session
@@ -16,21 +20,123 @@ GITHUB_REDIRECT_URI = (
 GITHUB_AUTHORIZATION_URL = (
     "https://github.com/login/oauth/authorize"
 )
+GITHUB_ACCESS_TOKEN_URL = (
+    "https://github.com/login/oauth/access_token"
+)
+GITHUB_USER_URL = "https://api.github.com/user"
+
+GITHUB_USER_CACHE_TTL = float(os.getenv("GITHUB_USER_CACHE_TTL", "300"))
+GITHUB_USER_CACHE_SIZE = int(os.getenv("GITHUB_USER_CACHE_SIZE", "1024"))
+
+
+def create_github_client(
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> httpx.AsyncClient:
+    # one pooled client for the whole app: connections are kept alive
+    # between calls so we only pay the TLS handshake once per host
+    limits = httpx.Limits(
+        max_connections=20,
+        max_keepalive_connections=10,
+        keepalive_expiry=30,
+    )
+    if transport is None:
+        # retries only cover connection errors, never a sent request
+        transport = httpx.AsyncHTTPTransport(limits=limits, retries=2)
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(5.0, connect=2.0),
+        headers={"Accept": "application/json"},
+    )
+
+
+def get_github_client(request: Request) -> httpx.AsyncClient:
+    return request.app.state.github_client
+
+
+class GithubUserCache:
+    """Access token -> GitHub profile, bounded in size and time."""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def _key(access_token: str) -> str:
+        # never keep raw tokens in memory longer than the request
+        return hashlib.sha256(access_token.encode()).hexdigest()
+
+    def get(self, access_token: str) -> dict | None:
+        key = self._key(access_token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, profile = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return profile
+
+    def set(self, access_token: str, profile: dict):
+        key = self._key(access_token)
+        self._entries[key] = (time.monotonic() + self.ttl, profile)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
 
-def resolve_github_token(access_token: str = Depends(OAuth2()),
+github_user_cache = GithubUserCache(
+    ttl=GITHUB_USER_CACHE_TTL, maxsize=GITHUB_USER_CACHE_SIZE
+)
+
+
+async def fetch_github_user(
+    access_token: str = Depends(OAuth2()),
+    client: httpx.AsyncClient = Depends(get_github_client),
+) -> dict:
+    profile = github_user_cache.get(access_token)
+    if profile is not None:
+        return profile
+    try:
+        response = await client.get(
+            GITHUB_USER_URL,
+            headers={"Authorization": f"{access_token}"},
+        )
+    except httpx.HTTPError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="GitHub is not reachable",
+        )
+    if not response.is_success:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token is not valid!",
+        )
+    user_response = response.json()
+    profile = {
+        "login": user_response.get("login", ""),
+        "email": user_response.get("email", ""),
+    }
+    github_user_cache.set(access_token, profile)
+    return profile
+
+
+def resolve_github_token(github_user: dict = Depends(fetch_github_user),
                          session: Session = Depends(get_session)) -> User | None:
-    user_response = httpx.get(
-        "https://api.github.com/user",
-        headers={"Authorization": f"{access_token}"},
-    ).json()
-    username = user_response.get("login", "")
-    user = get_user(session=session, username_or_email=username)
-    if not user:
-        email = user_response.get("email", "")
-        user = get_user(session=session, email=email)
+    user = get_user(
+        session=session, username_or_email=github_user["login"]
+    )
+    if not user and github_user["email"]:
+        user = get_user(
+            session=session, username_or_email=github_user["email"]
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Token is not valid!",
         )
-    return user
\ No newline at end of file
+    return user
@@ -0,0 +1,64 @@
+"""Items/sec for POST /item one at a time versus POST /items in bulk.
+
+Runs the app in-process against a throwaway SQLite file built with
+protoapp.db.create_db_engine, so the numbers include commit costs but no
+network.
+
+Run from ch-5 with: python -m benchmarks.bench_items
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from httpx import ASGITransport, AsyncClient
+from protoapp.db import Base, create_db_engine, create_session_factory
+from protoapp.main import app, get_db_session
+
+N = 2_000
+BATCH_SIZE = 500
+
+
+def item(i: int) -> dict:
+    return {"name": f"item-{i}", "color": "red"}
+
+
+async def main():
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_db_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = create_session_factory(engine)
+
+    async def get_bench_db_session():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db_session] = get_bench_db_session
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        start = time.perf_counter()
+        for i in range(N):
+            response = await client.post("/item", json=item(i))
+            response.raise_for_status()
+        single = N / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for offset in range(0, N, BATCH_SIZE):
+            response = await client.post(
+                "/items",
+                json=[item(i) for i in range(offset, offset + BATCH_SIZE)],
+            )
+            response.raise_for_status()
+        bulk = N / (time.perf_counter() - start)
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+    print(f"POST /item  (1 per request)   {single:10.0f} items/s")
+    print(f"POST /items ({BATCH_SIZE} per request) {bulk:10.0f} items/s")
+    print(f"speedup {bulk / single:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""GET /items query plans and latency over 1M items.
+
+Fills a throwaway SQLite file through protoapp.db.create_schema, then
+for each filter combination prints the EXPLAIN QUERY PLAN of
+operations.list_items_query and the best page time, walking a few pages
+with ?after= like a client would. Exits non-zero if a plan scans the
+table instead of using an index.
+
+Run from ch-5 with: python -m benchmarks.bench_items_listing [n_items]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.dialects import sqlite
+
+from protoapp.db import Item, create_schema
+from protoapp.operations import list_items_query
+
+N_ITEMS = 1_000_000
+PAGES = 20
+LIMIT = 100
+COLORS = ("red", "green", "blue", "yellow", "black")
+CASES = {
+    "all items": {},
+    "color": {"color": "red"},
+    "color + name_prefix": {"color": "red", "name_prefix": "item-12"},
+    "name_prefix": {"name_prefix": "item-12"},
+}
+
+
+def fill(engine, n_items: int):
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        for start in range(0, n_items, 50_000):
+            conn.execute(
+                insert(Item),
+                [
+                    {
+                        "name": f"item-{rng.randrange(n_items)}",
+                        "color": rng.choice(COLORS),
+                    }
+                    for _ in range(start, min(start + 50_000, n_items))
+                ],
+            )
+        conn.execute(text("ANALYZE"))
+
+
+def compile_query(query) -> str:
+    return str(query.compile(
+        dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+
+
+def walk_pages(conn, filters) -> float:
+    # best page latency in ms over PAGES consecutive keyset pages
+    best = float("inf")
+    after = None
+    for _ in range(PAGES):
+        query = list_items_query(**filters, after=after, limit=LIMIT)
+        start = time.perf_counter()
+        rows = conn.execute(query).all()
+        best = min(best, time.perf_counter() - start)
+        if len(rows) < LIMIT:
+            break
+        after = rows[-1][0]
+    return best * 1000
+
+
+def main():
+    n_items = int(sys.argv[1]) if len(sys.argv) > 1 else N_ITEMS
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    create_schema(url)
+    engine = create_engine(url)
+    start = time.perf_counter()
+    fill(engine, n_items)
+    print(f"inserted {n_items} items in {time.perf_counter() - start:.1f}s")
+
+    full_scans = []
+    with engine.connect() as conn:
+        for label, filters in CASES.items():
+            # plan for a follow-up page, the common case
+            query = list_items_query(**filters, after=n_items // 2)
+            plan = [
+                row.detail for row in conn.execute(
+                    text(f"EXPLAIN QUERY PLAN {compile_query(query)}")
+                )
+            ]
+            if any(
+                step.startswith("SCAN") and "INDEX" not in step
+                for step in plan
+            ):
+                full_scans.append(label)
+            print(f"{label:<22} {walk_pages(conn, filters):8.3f} ms/page")
+            for step in plan:
+                print(f"    {step}")
+    engine.dispose()
+    if full_scans:
+        print(f"full table scans: {', '.join(full_scans)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Per-request overhead of the request logging middleware.
+
+Compares the previous ``@app.middleware("http")`` implementation with
+RequestLoggingMiddleware on a bare /home route, with the logger at INFO
+(records built and handed to a NullHandler) and at WARNING (disabled).
+
+Run from ch-5 with: python -m benchmarks.bench_middleware
+"""
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI, Request
+
+from protoapp.middleware import RequestLoggingMiddleware
+
+N = 10_000
+REPEAT = 5
+
+logger = logging.getLogger("bench.client")
+logger.propagate = False
+logger.addHandler(logging.NullHandler())
+
+
+def plain_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/home")
+    async def read_main():
+        return {"message": "Hello from ch-5!"}
+
+    return app
+
+
+def decorator_app() -> FastAPI:
+    app = plain_app()
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        logger.info(
+            f"method: {request.method}, "
+            f"call: {request.url.path}, "
+            f"ip: {request.client.host}"
+        )
+        response = await call_next(request)
+        return response
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = plain_app()
+    app.add_middleware(RequestLoggingMiddleware, logger=logger)
+    return app
+
+
+async def run(app) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/home",
+        "raw_path": b"/home",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"bench")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(500):
+        await app(dict(scope), receive, send)
+    # best of REPEAT runs, the machine noise is larger than the overhead
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(N):
+            await app(dict(scope), receive, send)
+        best = min(best, time.perf_counter() - start)
+    return best / N * 1e6
+
+
+async def main():
+    baseline = await run(plain_app())
+    print(f"{'no middleware':<34} {baseline:7.1f} us/request")
+    for level in (logging.INFO, logging.WARNING):
+        logger.setLevel(level)
+        for label, factory in (
+            ("@app.middleware('http')", decorator_app),
+            ("RequestLoggingMiddleware", asgi_app),
+        ):
+            cost = await run(factory())
+            print(
+                f"{label:<25} {logging.getLevelName(level):<8}"
+                f" {cost:7.1f} us/request ({cost - baseline:+.1f} us)"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
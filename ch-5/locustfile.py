@@ -1,8 +1,244 @@
-from locust import HttpUser, task
+# Compare request logging modes on /home:
+#   CLIENT_LOG_QUEUE_SIZE=0 python run_server.py   (synchronous handlers)
+#   python run_server.py                           (queued handlers)
+#   locust -f locustfile.py --headless -u 50 -r 50 -t 30s
+#
+# Item scenario, headless with CSV output and a baseline check:
+#   locust -f locustfile.py --config loadtests/ci.conf
+#   LOCUST_LOAD_SHAPE=spike locust -f locustfile.py --config loadtests/ci.conf
+# --read-ratio sets the GET/POST /item mix, --save-baseline records
+# the current run as the new baseline instead of checking against it.
+#
+# Read-heavy scenario for the item cache, mostly conditional GETs:
+#   locust -f locustfile.py --config loadtests/read-heavy.conf
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+
+import requests
+from locust import HttpUser, LoadTestShape, between, events, task
+
+# "ramp", "spike" or "soak", picked at import because locust
+# selects the shape class when it loads this file
+LOAD_SHAPE = os.getenv("LOCUST_LOAD_SHAPE")
+SHAPE_USERS = int(os.getenv("LOCUST_SHAPE_USERS", "100"))
+SHAPE_DURATION = int(os.getenv("LOCUST_SHAPE_DURATION", "300"))
+
+COLORS = ("red", "green", "blue", "yellow", "black")
+# ids known to exist, shared by every user of this process
+item_ids: deque[int] = deque(maxlen=10_000)
+# last ETag seen per item id, replayed as If-None-Match
+etags: dict[int, str] = {}
+
+
+@events.init_command_line_parser.add_listener
+def add_arguments(parser):
+    parser.add_argument(
+        "--read-ratio",
+        type=float,
+        env_var="LOCUST_READ_RATIO",
+        default=0.8,
+        help="Share of item requests that are GET /item/{id}",
+    )
+    parser.add_argument(
+        "--id-pool-size",
+        type=int,
+        env_var="LOCUST_ID_POOL_SIZE",
+        default=200,
+        help="Items created before the test to read from",
+    )
+    parser.add_argument(
+        "--revalidate-ratio",
+        type=float,
+        env_var="LOCUST_REVALIDATE_RATIO",
+        default=0.0,
+        help="Share of item reads sent with a known ETag as If-None-Match",
+    )
+    parser.add_argument(
+        "--baseline",
+        env_var="LOCUST_BASELINE",
+        default="",
+        help="JSON file with p95 and error rate per endpoint",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        default=False,
+        help="Write this run's results to --baseline instead of checking",
+    )
+    parser.add_argument(
+        "--p95-tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative p95 increase over the baseline",
+    )
+    parser.add_argument(
+        "--error-rate-tolerance",
+        type=float,
+        default=0.01,
+        help="Allowed absolute error rate increase over the baseline",
+    )
+
+
+def random_item() -> dict:
+    return {
+        "name": f"item-{random.randrange(1_000_000)}",
+        "color": random.choice(COLORS),
+    }
+
+
+@events.test_start.add_listener
+def warm_id_pool(environment, **kwargs):
+    if not environment.host or item_ids:
+        return
+    with requests.Session() as session:
+        for _ in range(environment.parsed_options.id_pool_size):
+            response = session.post(
+                f"{environment.host}/item", json=random_item()
+            )
+            response.raise_for_status()
+            item_ids.append(response.json())
+
 
 class ProtoAppUser(HttpUser):
     host = "http://localhost:8000"
+    wait_time = between(0.01, 0.1)
 
-    @task
+    @task(1)
     def read_main(self):
-        self.client.get("/home")
\ No newline at end of file
+        self.client.get("/home")
+
+    @task(9)
+    def item(self):
+        options = self.environment.parsed_options
+        if item_ids and random.random() < options.read_ratio:
+            self.read_item(random.choice(item_ids), options.revalidate_ratio)
+        else:
+            with self.client.post(
+                "/item", json=random_item(), catch_response=True
+            ) as response:
+                if response.status_code == 201:
+                    item_ids.append(response.json())
+                else:
+                    response.failure(f"status {response.status_code}")
+
+    def read_item(self, item_id: int, revalidate_ratio: float):
+        headers = {}
+        etag = etags.get(item_id)
+        if etag and random.random() < revalidate_ratio:
+            headers["If-None-Match"] = etag
+        response = self.client.get(
+            f"/item/{item_id}", headers=headers, name="/item/{item_id}"
+        )
+        if "ETag" in response.headers:
+            etags[item_id] = response.headers["ETag"]
+
+
+class RampShape(LoadTestShape):
+    """Linear climb to SHAPE_USERS over SHAPE_DURATION seconds."""
+
+    abstract = True
+
+    def tick(self):
+        run_time = self.get_run_time()
+        if run_time > SHAPE_DURATION:
+            return None
+        users = max(1, round(SHAPE_USERS * run_time / SHAPE_DURATION))
+        return users, max(1, SHAPE_USERS / 10)
+
+
+class SpikeShape(LoadTestShape):
+    """10% load, a burst to SHAPE_USERS in the middle sixth, then 10%."""
+
+    abstract = True
+
+    def tick(self):
+        run_time = self.get_run_time()
+        if run_time > SHAPE_DURATION:
+            return None
+        baseline = max(1, SHAPE_USERS // 10)
+        spike_start = SHAPE_DURATION * 5 / 12
+        spike_end = SHAPE_DURATION * 7 / 12
+        if spike_start <= run_time < spike_end:
+            return SHAPE_USERS, SHAPE_USERS
+        return baseline, SHAPE_USERS
+
+
+class SoakShape(LoadTestShape):
+    """One minute ramp, then SHAPE_USERS held for SHAPE_DURATION."""
+
+    abstract = True
+
+    def tick(self):
+        run_time = self.get_run_time()
+        if run_time > SHAPE_DURATION + 60:
+            return None
+        return SHAPE_USERS, max(1, SHAPE_USERS / 60)
+
+
+SHAPES = {"ramp": RampShape, "spike": SpikeShape, "soak": SoakShape}
+
+if LOAD_SHAPE:
+    # a concrete subclass is what locust picks up as the active shape
+    ActiveShape = type("ActiveShape", (SHAPES[LOAD_SHAPE],), {})
+
+
+def summarize(stats) -> dict:
+    return {
+        entry.name: {
+            "method": entry.method,
+            "p95_ms": entry.get_response_time_percentile(0.95),
+            "error_rate": entry.fail_ratio,
+            "requests": entry.num_requests,
+        }
+        for entry in stats.entries.values()
+        if entry.num_requests
+    }
+
+
+def regressions(current: dict, baseline: dict, options) -> list[str]:
+    problems = []
+    for name, expected in baseline.items():
+        actual = current.get(name)
+        if actual is None:
+            continue
+        p95_limit = expected["p95_ms"] * (1 + options.p95_tolerance)
+        if actual["p95_ms"] > p95_limit:
+            problems.append(
+                f"{name}: p95 {actual['p95_ms']:.0f}ms"
+                f" > {p95_limit:.0f}ms"
+            )
+        error_limit = expected["error_rate"] + options.error_rate_tolerance
+        if actual["error_rate"] > error_limit:
+            problems.append(
+                f"{name}: error rate {actual['error_rate']:.2%}"
+                f" > {error_limit:.2%}"
+            )
+    return problems
+
+
+@events.quitting.add_listener
+def check_baseline(environment, **kwargs):
+    options = environment.parsed_options
+    if not options or not options.baseline:
+        return
+    current = summarize(environment.stats)
+    if options.save_baseline:
+        with open(options.baseline, "w") as f:
+            json.dump(
+                {"recorded_at": time.strftime("%Y-%m-%d"), "endpoints": current},
+                f,
+                indent=2,
+            )
+        logging.info("Baseline written to %s", options.baseline)
+        return
+    with open(options.baseline) as f:
+        baseline = json.load(f)["endpoints"]
+    problems = regressions(current, baseline, options)
+    for problem in problems:
+        logging.error("Regression against baseline: %s", problem)
+    if problems:
+        environment.process_exit_code = 1
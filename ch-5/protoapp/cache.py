@@ -0,0 +1,96 @@
+"""In-process cache of encoded item responses.
+
+Items never change after creation, so a cached entry only has to be
+evicted for space, and its ETag can be derived from the item id alone.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from protoapp.metrics import ITEM_CACHE_ENTRIES, ITEM_CACHE_REQUESTS
+
+ITEM_CACHE_SIZE = int(os.getenv("ITEM_CACHE_SIZE", "10000"))
+# seconds, 0 keeps entries until they are evicted for space
+ITEM_CACHE_TTL = float(os.getenv("ITEM_CACHE_TTL", "0"))
+ITEM_MAX_AGE = int(os.getenv("ITEM_MAX_AGE", "3600"))
+# bump when the item representation changes so clients drop old copies
+ITEM_REPRESENTATION_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class CachedItem:
+    body: bytes
+    etag: str
+
+
+def item_etag(item_id: int) -> str:
+    digest = hashlib.sha1(
+        f"{item_id}:{ITEM_REPRESENTATION_VERSION}".encode()
+    ).hexdigest()
+    return f'"{digest[:16]}"'
+
+
+def encode_item(item_id: int, name: str, color: str) -> CachedItem:
+    body = json.dumps(
+        {"name": name, "color": color}, separators=(",", ":")
+    ).encode()
+    return CachedItem(body=body, etag=item_etag(item_id))
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # weak comparison, as RFC 9110 asks for If-None-Match
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag.removeprefix("W/") for tag in candidates)
+
+
+class ItemCache:
+    """item id -> encoded response, LRU bounded with an optional TTL."""
+
+    def __init__(self, maxsize: int, ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[float, CachedItem]] = (
+            OrderedDict()
+        )
+
+    def get(self, item_id: int) -> CachedItem | None:
+        entry = self._entries.get(item_id)
+        if entry is not None:
+            expires_at, item = entry
+            if not self.ttl or expires_at >= time.monotonic():
+                self._entries.move_to_end(item_id)
+                ITEM_CACHE_REQUESTS.inc("hit")
+                return item
+            del self._entries[item_id]
+            ITEM_CACHE_ENTRIES.set(value=len(self._entries))
+        ITEM_CACHE_REQUESTS.inc("miss")
+        return None
+
+    def set(self, item_id: int, item: CachedItem):
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        self._entries[item_id] = (expires_at, item)
+        self._entries.move_to_end(item_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        ITEM_CACHE_ENTRIES.set(value=len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        ITEM_CACHE_ENTRIES.set(value=0)
+
+
+item_cache = ItemCache(ITEM_CACHE_SIZE, ttl=ITEM_CACHE_TTL)
+
+
+def get_item_cache() -> ItemCache:
+    return item_cache
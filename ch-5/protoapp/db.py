@@ -1,28 +1,79 @@
 import logging
 
-from sqlalchemy import create_engine
+from sqlalchemy import Index, create_engine, event
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
     mapped_column,
-    sessionmaker,
 )
 
 logger = logging.getLogger(__name__)
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./ch5.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./ch5.db"
 
 class Base(DeclarativeBase):
     pass
 
 class Item(Base):
     __tablename__ = "items"
+    # every SQLite index also stores the rowid, so this one covers
+    # the listing query: filter on color and name, return id
+    __table_args__ = (Index("ix_items_color_name", "color", "name"),)
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     name: Mapped[str] = mapped_column(index=True)
     color: Mapped[str]
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
-Base.metadata.create_all(bind=engine)
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run while a writer holds the lock
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+def create_db_engine(
+    url: str = ASYNC_SQLALCHEMY_DATABASE_URL,
+) -> AsyncEngine:
+    """Build the app's async engine, called from the lifespan.
+
+    Nothing here runs at import, so importing protoapp never opens or
+    creates the database file.
+    """
+    # each aiosqlite connection runs on its own thread, so the pool bounds
+    # how many DB threads requests can keep busy at once
+    engine = create_async_engine(
+        url,
+        pool_size=10,
+        max_overflow=10,
+        pool_timeout=10,
+        connect_args={"timeout": 15},
+    )
+    event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        engine, autoflush=False, expire_on_commit=False
+    )
+
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+def create_schema(url: str = SQLALCHEMY_DATABASE_URL):
+    """Create missing tables, run by ``python -m protoapp.migrate``."""
+    engine = create_engine(url)
+    try:
+        Base.metadata.create_all(bind=engine)
+        # create_all skips tables that exist, add indexes added since
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+    finally:
+        engine.dispose()
+    logger.info("Schema up to date at %s", url)
@@ -1,25 +1,133 @@
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import os
+import queue
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    TimedRotatingFileHandler,
+)
 
 from uvicorn.logging import ColourizedFormatter
 
+from protoapp.metrics import LOG_RECORDS_DROPPED
+
+# "text" or "json"
+LOG_FORMAT = os.getenv("CLIENT_LOG_FORMAT", "text")
+# 0 keeps the old synchronous handlers, handy to compare under load
+LOG_QUEUE_SIZE = int(os.getenv("CLIENT_LOG_QUEUE_SIZE", "10000"))
+# "drop" never waits; "block" waits up to LOG_BLOCK_TIMEOUT for room on
+# the logging thread, which is the event loop, stalling every request
+LOG_OVERFLOW = os.getenv("CLIENT_LOG_OVERFLOW", "drop")
+LOG_BLOCK_TIMEOUT = 0.1
+
+# attributes every LogRecord has, anything else was passed via extra=
+_RECORD_ATTRS = frozenset(
+    logging.makeLogRecord({}).__dict__
+) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler with a bounded queue and a choice on overflow.
+
+    With ``overflow="drop"``, the default, a full queue costs nothing:
+    the record is counted in ``dropped`` and in the
+    log_records_dropped_total metric, and discarded. With "block" the
+    calling thread waits up to LOG_BLOCK_TIMEOUT per record for room,
+    and when that is the event loop every request stalls meanwhile; use
+    it only when losing records is worse than latency.
+    """
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = "drop"):
+        super().__init__(log_queue)
+        self.overflow = overflow
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            if self.overflow == "block":
+                self.queue.put(record, timeout=LOG_BLOCK_TIMEOUT)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            LOG_RECORDS_DROPPED.inc()
+
+
 client_logger = logging.getLogger("client.logger")
 client_logger.setLevel(logging.INFO)
 
 # logging to console
 console_handler = logging.StreamHandler()
-console_formatter = ColourizedFormatter(
-    "%(levelprefix)s CLIENT CALL - %(message)s",
-    use_colors=True,
-)
+if LOG_FORMAT == "json":
+    console_formatter = JsonFormatter()
+else:
+    console_formatter = ColourizedFormatter(
+        "%(levelprefix)s CLIENT CALL - %(message)s",
+        use_colors=True,
+    )
 console_handler.setFormatter(console_formatter)
-client_logger.addHandler(console_handler)
 
 # logging to file
-file_handler = TimedRotatingFileHandler("app.log")
-file_formatter = logging.Formatter(
-    "time %(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+# delay opens app.log on the first record, not at import
+file_handler = TimedRotatingFileHandler("app.log", delay=True)
+if LOG_FORMAT == "json":
+    file_formatter = JsonFormatter()
+else:
+    file_formatter = logging.Formatter(
+        "time %(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
 file_handler.setFormatter(file_formatter)
-client_logger.addHandler(file_handler)
\ No newline at end of file
+
+if LOG_QUEUE_SIZE > 0:
+    # the request path only enqueues, the listener thread does the I/O
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = BoundedQueueHandler(log_queue, overflow=LOG_OVERFLOW)
+    client_logger.addHandler(queue_handler)
+    listener = QueueListener(
+        log_queue,
+        console_handler,
+        file_handler,
+        respect_handler_level=True,
+    )
+else:
+    queue_handler = None
+    listener = None
+    client_logger.addHandler(console_handler)
+    client_logger.addHandler(file_handler)
+
+
+_listener_running = False
+
+
+def start_logging():
+    global _listener_running
+    if listener is not None and not _listener_running:
+        listener.start()
+        _listener_running = True
+
+
+def stop_logging():
+    # flushes whatever is still queued before returning
+    global _listener_running
+    if listener is not None and _listener_running:
+        listener.stop()
+        _listener_running = False
+
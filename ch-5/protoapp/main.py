@@ -1,55 +1,165 @@
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Annotated
+
 from fastapi import (
     FastAPI,
     Depends,
-    Request,
+    Header,
     HTTPException,
+    Query,
+    Request,
+    Response,
     status
 )
-from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
 
-from protoapp.db import Item, SessionLocal
-from protoapp.logging import client_logger
+from protoapp import operations
+from protoapp.cache import (
+    ITEM_MAX_AGE,
+    ItemCache,
+    encode_item,
+    etag_matches,
+    get_item_cache,
+)
+from protoapp.db import create_db_engine, create_session_factory
+from protoapp.logging import start_logging, stop_logging
+from protoapp.metrics import instrument_engine
+from protoapp.middleware import RequestLoggingMiddleware
+from protoapp.prometheus import MetricsMiddleware, metrics_endpoint
 
-app = FastAPI()
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    client_logger.info(
-        f"method: {request.method}, "
-        f"call: {request.url.path}, "
-        f"ip: {request.client.host}"
-    )
-    response = await call_next(request)
-    return response
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_logging()
+    # the engine is built here rather than at import, the schema is
+    # created beforehand by ``python -m protoapp.migrate``
+    engine = create_db_engine()
+    instrument_engine(engine)
+    app.state.db_engine = engine
+    app.state.session_factory = create_session_factory(engine)
+    yield
+    await engine.dispose()
+    stop_logging()
+
 
+app = FastAPI(lifespan=lifespan)
 
-def get_db_session():
-    db = SessionLocal()
-    try:
+app.add_middleware(
+    RequestLoggingMiddleware,
+    sample_rate=float(os.getenv("CLIENT_LOG_SAMPLE_RATE", "1.0")),
+)
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+
+async def get_db_session(request: Request):
+    async with request.app.state.session_factory() as db:
         yield db
-    finally:
-        db.close()
 
 class ItemSchema(BaseModel):
     name: str
     color: str
 
+class ListedItemSchema(ItemSchema):
+    id: int
+
+class ItemPageSchema(BaseModel):
+    items: list[ListedItemSchema]
+    next_after: int | None
+
+# most items one POST /items may insert, all in one transaction
+ITEMS_MAX_BATCH = int(os.getenv("ITEMS_MAX_BATCH", "1000"))
+# rows fetched and encoded per chunk of a streamed /items page
+ITEMS_CHUNK_SIZE = 500
+
 @app.get("/home")
 async def read_main():
     return {"message": "Hello from ch-5!"}
 
 @app.post("/item", response_model=int, status_code=status.HTTP_201_CREATED)
-async def add_item(item: ItemSchema, db: Session = Depends(get_db_session)):
-    db_item = Item(name=item.name, color=item.color)
-    db.add(db_item)
-    db.commit()
-    db.refresh(db_item)
-    return db_item.id
+async def add_item(item: ItemSchema, db: AsyncSession = Depends(get_db_session)):
+    return await operations.add_item(db, item.name, item.color)
+
+@app.post(
+    "/items",
+    response_model=list[int],
+    status_code=status.HTTP_201_CREATED,
+)
+async def add_items(
+    items: Annotated[list[ItemSchema], Field(max_length=ITEMS_MAX_BATCH)],
+    db: AsyncSession = Depends(get_db_session),
+):
+    return await operations.add_items(
+        db, [item.model_dump() for item in items]
+    )
 
 @app.get("/item/{item_id}", response_model=ItemSchema)
-async def get_item(item_id: int, db: Session = Depends(get_db_session)):
-    db_item = db.query(Item).filter(Item.id == item_id).first()
-    if not db_item:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
-    return db_item
\ No newline at end of file
+async def get_item(
+    item_id: int,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_db_session),
+    cache: ItemCache = Depends(get_item_cache),
+):
+    cached = cache.get(item_id)
+    if cached is None:
+        db_item = await operations.get_item(db, item_id)
+        if not db_item:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item not found")
+        cached = encode_item(db_item.id, db_item.name, db_item.color)
+        cache.set(item_id, cached)
+    headers = {
+        "ETag": cached.etag,
+        "Cache-Control": f"public, max-age={ITEM_MAX_AGE}, immutable",
+    }
+    if etag_matches(if_none_match, cached.etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+        )
+    # already encoded, skips response_model validation on every read
+    return Response(
+        cached.body, media_type="application/json", headers=headers
+    )
+
+async def encode_item_page(result, limit):
+    # rows are read from the cursor and encoded one chunk at a time
+    yield b'{"items":['
+    count, last_id = 0, None
+    async for rows in result.partitions(ITEMS_CHUNK_SIZE):
+        chunk = ",".join(
+            json.dumps(
+                {"id": item_id, "name": name, "color": color},
+                separators=(",", ":"),
+            )
+            for item_id, name, color in rows
+        )
+        yield (chunk if count == 0 else "," + chunk).encode()
+        count += len(rows)
+        last_id = rows[-1][0]
+    # a full page means there may be more, pass its last id as ?after=
+    next_after = last_id if count == limit else None
+    yield f'],"next_after":{json.dumps(next_after)}}}'.encode()
+
+@app.get(
+    "/items",
+    response_model=None,
+    responses={200: {"model": ItemPageSchema}},
+)
+async def list_items(
+    color: str | None = None,
+    name_prefix: str | None = None,
+    after: int | None = Query(default=None, ge=0),
+    limit: int = Query(default=100, ge=1, le=10_000),
+    db: AsyncSession = Depends(get_db_session),
+):
+    # run here so a failing query is still a 500, not a cut-off body;
+    # the session stays open until the response is sent
+    result = await operations.stream_items(
+        db, color, name_prefix, after, limit
+    )
+    return StreamingResponse(
+        encode_item_page(result, limit), media_type="application/json"
+    )
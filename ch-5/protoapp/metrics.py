@@ -0,0 +1,69 @@
+"""Database, item cache and logging metrics of this app.
+
+The collectors, the registry, the request middleware and the /metrics
+endpoint are in protoapp.prometheus, vendored unchanged by every
+chapter; this module only adds what ch-5 measures on top of them.
+"""
+import time
+
+from sqlalchemy import event
+
+from protoapp.prometheus import Counter, Gauge, Histogram, registry
+
+DB_QUERIES = registry.register(Counter(
+    "db_queries_total",
+    "SQL statements executed.",
+    ("statement",),
+))
+DB_QUERY_LATENCY = registry.register(Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency.",
+    ("statement",),
+))
+DB_CONNECTIONS_CHECKED_OUT = registry.register(Gauge(
+    "db_pool_connections_checked_out",
+    "Connections currently checked out of the pool.",
+))
+ITEM_CACHE_REQUESTS = registry.register(Counter(
+    "item_cache_requests_total",
+    "Item cache lookups by result, hit or miss.",
+    ("result",),
+))
+ITEM_CACHE_ENTRIES = registry.register(Gauge(
+    "item_cache_entries",
+    "Items currently held in the item cache.",
+))
+LOG_RECORDS_DROPPED = registry.register(Counter(
+    "log_records_dropped_total",
+    "Client log records discarded because the log queue was full.",
+))
+
+
+def instrument_engine(engine):
+    """Count and time every statement, and track pool checkouts."""
+    engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, many):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        kind = statement.lstrip().split(None, 1)[0].upper()
+        DB_QUERIES.inc(kind)
+        DB_QUERY_LATENCY.observe(duration, kind)
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_CONNECTIONS_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        DB_CONNECTIONS_CHECKED_OUT.dec()
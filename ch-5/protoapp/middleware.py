@@ -0,0 +1,56 @@
+import logging
+import random
+import time
+
+from protoapp.logging import client_logger
+
+
+class RequestLoggingMiddleware:
+    """Logs and times every HTTP request without wrapping it in a task.
+
+    Only a ``sample_rate`` fraction of requests is logged, server errors
+    always are. Latency histograms live in protoapp.prometheus.
+    """
+
+    def __init__(
+        self,
+        app,
+        logger: logging.Logger = client_logger,
+        sample_rate: float = 1.0,
+    ):
+        self.app = app
+        self.logger = logger
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            if self.logger.isEnabledFor(logging.INFO) and (
+                status_code >= 500
+                or self.sample_rate >= 1
+                or random.random() < self.sample_rate
+            ):
+                client = scope.get("client")
+                self.logger.info(
+                    "method: %s, call: %s, ip: %s, status: %d, "
+                    "duration: %.2fms",
+                    scope["method"],
+                    scope["path"],
+                    client[0] if client else None,
+                    status_code,
+                    duration * 1000,
+                )
@@ -0,0 +1,18 @@
+"""Create the ch-5 schema before starting the server.
+
+Run from ch-5 with: python -m protoapp.migrate [database-url]
+"""
+import logging
+import sys
+
+from protoapp.db import SQLALCHEMY_DATABASE_URL, create_schema
+
+
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    logging.basicConfig(level=logging.INFO)
+    create_schema(argv[0] if argv else SQLALCHEMY_DATABASE_URL)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import sys
+
+from sqlalchemy import Select, insert, select
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
+
+from protoapp.db import Item
+
+
+async def add_item(session: AsyncSession, name: str, color: str) -> int:
+    # INSERT ... RETURNING hands back the id, no refresh SELECT needed
+    result = await session.execute(
+        insert(Item).values(name=name, color=color).returning(Item.id)
+    )
+    await session.commit()
+    return result.scalar_one()
+
+
+async def add_items(session: AsyncSession, items: list[dict]) -> list[int]:
+    if not items:
+        return []
+    # one executemany; ids come back in the order of ``items``
+    result = await session.execute(
+        insert(Item).returning(Item.id, sort_by_parameter_order=True),
+        items,
+    )
+    await session.commit()
+    return list(result.scalars())
+
+
+async def get_item(session: AsyncSession, item_id: int) -> Item | None:
+    result = await session.execute(select(Item).where(Item.id == item_id))
+    return result.scalars().first()
+
+
+def next_prefix(prefix: str) -> str | None:
+    """Smallest string greater than every string starting with prefix.
+
+    None when there is no such string, for an empty prefix or one made
+    only of U+10FFFF, the last code point.
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        # surrogates cannot be encoded for the database, skip them
+        code = 0xE000
+    return prefix[:-1] + chr(code)
+
+
+def list_items_query(
+    color: str | None = None,
+    name_prefix: str | None = None,
+    after: int | None = None,
+    limit: int = 100,
+) -> Select:
+    query = select(Item.id, Item.name, Item.color)
+    if color is not None:
+        query = query.where(Item.color == color)
+    if name_prefix:
+        # a range instead of LIKE, which SQLite only runs on an index
+        # for case-insensitive columns
+        query = query.where(Item.name >= name_prefix)
+        upper = next_prefix(name_prefix)
+        if upper is not None:
+            query = query.where(Item.name < upper)
+    if after is not None:
+        query = query.where(Item.id > after)
+    return query.order_by(Item.id).limit(limit)
+
+
+async def stream_items(
+    session: AsyncSession,
+    color: str | None = None,
+    name_prefix: str | None = None,
+    after: int | None = None,
+    limit: int = 100,
+) -> AsyncResult:
+    """Run the listing query on a server-side cursor.
+
+    Rows are fetched as the result is read, with ``partitions(n)`` for
+    batches, so a page is never held in memory all at once.
+    """
+    return await session.stream(
+        list_items_query(color, name_prefix, after, limit)
+    )
@@ -1,5 +1,7 @@
 import uvicorn
 from protoapp.main import app
+from protoapp.migrate import main as migrate
 
 if __name__ == "__main__":
-    uvicorn.run(app)
\ No newline at end of file
+    migrate([])
+    uvicorn.run(app)
@@ -1,31 +1,92 @@
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy.pool import StaticPool
-from sqlalchemy import create_engine, inspect
-from sqlalchemy.orm import sessionmaker
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
 
+from protoapp.cache import item_cache
+from protoapp.db import create_schema
 from protoapp.main import app, get_db_session
-from protoapp.db import Base
 
-engine = create_engine("sqlite:///:memory:", 
-                        connect_args={"check_same_thread": False},
-                        poolclass=StaticPool)
 
-Base.metadata.create_all(bind=engine)
+@pytest.fixture(scope="session")
+def db_path(tmp_path_factory):
+    # tmp_path_factory is per xdist worker, so each worker gets its own
+    # file and the schema is created once per worker
+    path = tmp_path_factory.mktemp("db") / "test.db"
+    create_schema(f"sqlite:///{path}")
+    return path
+
+
+@pytest.fixture(scope="session")
+def db_engine(db_path):
+    # NullPool: connections never outlive the event loop of the test
+    # that opened them
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool
+    )
+
+    # pysqlite manages transactions itself and breaks SAVEPOINT, take
+    # over BEGIN so nested transactions work
+    @event.listens_for(engine.sync_engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, "begin")
+    def begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+    yield engine
+    engine.sync_engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def test_db_session(db_engine):
+    """Session inside a transaction rolled back after the test.
+
+    Commits made by the app only release a SAVEPOINT, so nothing a test
+    writes is visible to the next one.
+    """
+    async with db_engine.connect() as conn:
+        transaction = await conn.begin()
+        session = AsyncSession(
+            bind=conn,
+            join_transaction_mode="create_savepoint",
+            autoflush=False,
+            expire_on_commit=False,
+        )
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
 
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture
-def test_db_session():
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def override_db_session(test_db_session):
+    async def get_testing_db_session():
+        yield test_db_session
+
+    app.dependency_overrides[get_db_session] = get_testing_db_session
+    yield
+    app.dependency_overrides.clear()
+
 
 @pytest.fixture(scope="function")
-def test_client(test_db_session):
-    client = TestClient(app)
-    app.dependency_overrides[get_db_session] = (lambda: test_db_session)
-    
-    return client
\ No newline at end of file
+def test_client(override_db_session):
+    return TestClient(app)
+
+
+@pytest_asyncio.fixture
+async def async_client(override_db_session):
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def reset_item_cache():
+    item_cache.clear()
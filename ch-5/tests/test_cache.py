@@ -0,0 +1,75 @@
+import pytest
+
+from protoapp.cache import ItemCache, encode_item, etag_matches, item_etag
+from protoapp.metrics import ITEM_CACHE_REQUESTS
+from protoapp.prometheus import registry
+
+
+@pytest.mark.unit
+def test_item_cache_evicts_least_recently_used():
+    cache = ItemCache(maxsize=2)
+    for item_id in (1, 2):
+        cache.set(item_id, encode_item(item_id, "ball", "red"))
+    cache.get(1)
+    cache.set(3, encode_item(3, "kite", "blue"))
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+    assert len(cache) == 2
+
+
+@pytest.mark.unit
+def test_item_cache_expires_entries(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr("protoapp.cache.time.monotonic", lambda: now)
+    cache = ItemCache(maxsize=10, ttl=5)
+    cache.set(1, encode_item(1, "ball", "red"))
+    now += 4
+    assert cache.get(1) is not None
+    now += 2
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+@pytest.mark.unit
+def test_etag_matching():
+    etag = item_etag(1)
+    assert etag != item_etag(2)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(item_etag(2), etag)
+
+
+@pytest.mark.integration
+def test_get_item_is_cached_and_conditional(test_client):
+    registry.clear()
+    item_id = test_client.post(
+        "/item", json={"name": "ball", "color": "red"}
+    ).json()
+
+    first = test_client.get(f"/item/{item_id}")
+    second = test_client.get(f"/item/{item_id}")
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json() == {"name": "ball", "color": "red"}
+    assert first.headers["etag"] == item_etag(item_id)
+    assert "max-age" in first.headers["cache-control"]
+    assert ITEM_CACHE_REQUESTS.get("miss") == 1
+    assert ITEM_CACHE_REQUESTS.get("hit") == 1
+
+    response = test_client.get(
+        f"/item/{item_id}",
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == first.headers["etag"]
+
+
+@pytest.mark.integration
+def test_missing_item_is_not_cached(test_client):
+    registry.clear()
+    for _ in range(2):
+        assert test_client.get("/item/999999").status_code == 404
+    assert ITEM_CACHE_REQUESTS.get("miss") == 2
+    assert ITEM_CACHE_REQUESTS.get("hit") == 0
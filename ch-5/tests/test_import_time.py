@@ -0,0 +1,60 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, inspect
+
+from protoapp.db import Base, create_schema
+
+CH5 = Path(__file__).resolve().parent.parent
+# microseconds, cumulative for protoapp.main as reported by -X importtime
+IMPORT_BUDGET_US = int(os.getenv("PROTOAPP_IMPORT_BUDGET_US", "1500000"))
+
+
+def import_protoapp_main(cwd) -> int:
+    env = {**os.environ, "PYTHONPATH": str(CH5)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import protoapp.main"],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == "protoapp.main":
+            return int(parts[1])
+    raise AssertionError("protoapp.main missing from -X importtime output")
+
+
+@pytest.mark.unit
+def test_import_protoapp_main_within_budget(tmp_path):
+    # best of three, the first run also pays for cold bytecode caches
+    cumulative = min(import_protoapp_main(tmp_path) for _ in range(3))
+    assert cumulative < IMPORT_BUDGET_US, (
+        f"importing protoapp.main took {cumulative}us,"
+        f" budget is {IMPORT_BUDGET_US}us"
+    )
+
+
+@pytest.mark.unit
+def test_import_has_no_filesystem_side_effects(tmp_path):
+    import_protoapp_main(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.unit
+def test_create_schema_creates_tables(tmp_path):
+    url = f"sqlite:///{tmp_path / 'ch5.db'}"
+    create_schema(url)
+    create_schema(url)  # idempotent
+
+    engine = create_engine(url)
+    assert set(inspect(engine).get_table_names()) == set(
+        Base.metadata.tables
+    )
+    engine.dispose()
@@ -0,0 +1,133 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import sqlite
+
+from protoapp import main
+from protoapp.db import Base
+from protoapp.operations import (
+    list_items_query,
+    next_prefix,
+    stream_items,
+)
+
+ITEMS = [
+    {"name": "ball", "color": "red"},
+    {"name": "balloon", "color": "red"},
+    {"name": "bat", "color": "red"},
+    {"name": "ball", "color": "blue"},
+    {"name": "kite", "color": "red"},
+]
+
+
+@pytest.fixture
+def created_ids(test_client):
+    response = test_client.post("/items", json=ITEMS)
+    return response.json()
+
+
+def query_plan(engine, query) -> str:
+    compiled = query.compile(
+        dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    with engine.connect() as conn:
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+        return "\n".join(row.detail for row in rows)
+
+
+@pytest.mark.unit
+def test_next_prefix():
+    assert next_prefix("bal") == "bam"
+    assert "ball" < next_prefix("bal")
+    assert "bam" >= next_prefix("bal")
+    assert next_prefix("a\U0010ffff") == "b"
+    assert next_prefix("a\ud7ff") == "a\ue000"
+    assert next_prefix("\U0010ffff") is None
+    assert next_prefix("") is None
+
+
+@pytest.mark.integration
+def test_list_items_filters_by_color_and_prefix(test_client, created_ids):
+    response = test_client.get(
+        "/items",
+        params={
+            "color": "red",
+            "name_prefix": "bal",
+            "after": created_ids[0] - 1,
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == {
+        "items": [
+            {"id": created_ids[0], "name": "ball", "color": "red"},
+            {"id": created_ids[1], "name": "balloon", "color": "red"},
+        ],
+        "next_after": None,
+    }
+
+
+@pytest.mark.integration
+def test_list_items_pages_with_keyset(test_client, created_ids):
+    seen = []
+    after = created_ids[0] - 1
+    while after is not None:
+        page = test_client.get(
+            "/items", params={"color": "red", "after": after, "limit": 2}
+        ).json()
+        seen.extend(item["id"] for item in page["items"])
+        after = page["next_after"]
+    assert seen == [created_ids[i] for i in (0, 1, 2, 4)]
+
+
+@pytest.mark.integration
+def test_list_items_prefix_without_upper_bound(test_client, created_ids):
+    response = test_client.get(
+        "/items", params={"color": "red", "name_prefix": "\U0010ffff"}
+    )
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+
+@pytest.mark.integration
+def test_list_items_rejects_bad_limit(test_client):
+    assert test_client.get("/items", params={"limit": 0}).status_code == 422
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "filters, expected",
+    [
+        ({"color": "red"}, "COVERING INDEX ix_items_color_name"),
+        (
+            {"color": "red", "name_prefix": "bal"},
+            "COVERING INDEX ix_items_color_name"
+            " (color=? AND name>? AND name<?)",
+        ),
+        ({"after": 10}, "INTEGER PRIMARY KEY (rowid>?)"),
+    ],
+)
+def test_list_items_query_uses_an_index(filters, expected):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    plan = query_plan(engine, list_items_query(**filters))
+    assert expected in plan
+    engine.dispose()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_list_items_streams_in_chunks(
+    test_db_session, created_ids, monkeypatch
+):
+    monkeypatch.setattr(main, "ITEMS_CHUNK_SIZE", 2)
+    result = await stream_items(
+        test_db_session, after=created_ids[0] - 1, limit=5
+    )
+    chunks = [chunk async for chunk in main.encode_item_page(result, 5)]
+    # opening bracket, three chunks of at most two rows, next_after
+    assert len(chunks) == 5
+    page = json.loads(b"".join(chunks))
+    assert [item["id"] for item in page["items"]] == created_ids
+    assert page["next_after"] == created_ids[-1]
@@ -0,0 +1,35 @@
+import json
+import logging
+import queue
+
+from protoapp.logging import BoundedQueueHandler, JsonFormatter
+from protoapp.metrics import LOG_RECORDS_DROPPED
+from protoapp.prometheus import registry
+
+
+def make_record(message="hello", **extra):
+    record = logging.makeLogRecord(
+        {"name": "client.logger", "levelno": logging.INFO,
+         "levelname": "INFO", "msg": message}
+    )
+    record.__dict__.update(extra)
+    return record
+
+
+def test_queue_handler_drops_when_full():
+    registry.clear()
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2), overflow="drop")
+    for _ in range(5):
+        handler.handle(make_record())
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+    assert LOG_RECORDS_DROPPED.get() == 3
+    assert "log_records_dropped_total 3" in registry.render()
+
+
+def test_json_formatter_includes_extra_fields():
+    line = JsonFormatter().format(make_record("call", method="GET"))
+    entry = json.loads(line)
+    assert entry["message"] == "call"
+    assert entry["level"] == "INFO"
+    assert entry["method"] == "GET"
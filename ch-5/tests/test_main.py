@@ -1,7 +1,7 @@
 import pytest
 from httpx import ASGITransport, AsyncClient
 
-from protoapp.main import app
+from protoapp.main import ITEMS_MAX_BATCH, app
 from protoapp.db import Item
 
 @pytest.mark.asyncio
@@ -21,21 +21,60 @@ def test_read_main_client(test_client):
     assert response.json() == {"message": "Hello from ch-5!"}
 
 @pytest.mark.integration
-def test_client_can_add_read_the_item_from_database(test_client, test_db_session):
-    response = test_client.get("/item/1")
+@pytest.mark.asyncio
+async def test_client_can_add_read_the_item_from_database(test_client, test_db_session):
+    response = test_client.get("/item/999999")
     assert response.status_code == 404
     
     response = test_client.post("/item", json={"name": "ball", "color": "red"})
     assert response.status_code == 201
 
     item_id = response.json()
-    item = (
-        test_db_session.query(Item)
-        .filter(Item.id == item_id)
-        .first()
-    )
+    item = await test_db_session.get(Item, item_id)
     assert item is not None
 
-    response = test_client.get(f"/item/1")
+    response = test_client.get(f"/item/{item_id}")
     assert response.status_code == 200
-    assert response.json() == {"name": "ball", "color": "red"}
\ No newline at end of file
+    assert response.json() == {"name": "ball", "color": "red"}
+
+@pytest.mark.integration
+def test_client_can_add_items_in_bulk(test_client):
+    response = test_client.post(
+        "/items",
+        json=[
+            {"name": "ball", "color": "red"},
+            {"name": "kite", "color": "blue"},
+        ],
+    )
+    assert response.status_code == 201
+    ids = response.json()
+    assert len(ids) == 2 and ids[0] < ids[1]
+
+    response = test_client.get(f"/item/{ids[1]}")
+    assert response.json() == {"name": "kite", "color": "blue"}
+
+    response = test_client.post("/items", json=[])
+    assert response.status_code == 201
+    assert response.json() == []
+
+    response = test_client.post(
+        "/items",
+        json=[{"name": "ball", "color": "red"}] * (ITEMS_MAX_BATCH + 1),
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_each_test_starts_from_an_empty_database(async_client):
+    # other tests commit items, their transactions are rolled back
+    response = await async_client.get("/items")
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_after": None}
+
+    response = await async_client.post(
+        "/item", json={"name": "ball", "color": "red"}
+    )
+    assert response.status_code == 201
+    response = await async_client.get(f"/item/{response.json()}")
+    assert response.json() == {"name": "ball", "color": "red"}
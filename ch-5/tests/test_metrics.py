@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from protoapp import prometheus
+from protoapp.metrics import DB_QUERIES, instrument_engine
+from protoapp.prometheus import (
+    UNMATCHED_ROUTE,
+    REQUEST_LATENCY,
+    REQUESTS,
+    Histogram,
+    registry,
+)
+
+# chapters that vendor protoapp/prometheus.py, relative to the repo root
+PROMETHEUS_COPIES = (
+    "ch-6/app/prometheus.py",
+    "ch-7/streaming/app/prometheus.py",
+    "ch-8/app/prometheus.py",
+)
+
+
+def test_vendored_prometheus_copies_match():
+    reference = Path(prometheus.__file__)
+    root = reference.parents[2]
+    for copy in PROMETHEUS_COPIES:
+        assert (root / copy).read_bytes() == reference.read_bytes(), copy
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency", "doc", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.05, 0.5, 2.0):
+        histogram.observe(value, "/a")
+    assert histogram.render() == [
+        'latency_bucket{route="/a",le="0.1"} 2',
+        'latency_bucket{route="/a",le="1.0"} 3',
+        'latency_bucket{route="/a",le="+Inf"} 4',
+        'latency_sum{route="/a"} 2.6',
+        'latency_count{route="/a"} 4',
+    ]
+
+
+def test_metrics_endpoint_reports_routes_and_queries(
+    test_client, db_engine
+):
+    registry.clear()
+    instrument_engine(db_engine)
+    item_id = test_client.post(
+        "/item", json={"name": "ball", "color": "red"}
+    ).json()
+    test_client.get(f"/item/{item_id}")
+    test_client.get("/item/999999")
+    test_client.get("/does-not-exist")
+
+    assert REQUESTS.get("GET", "/item/{item_id}", "200") == 1
+    assert REQUESTS.get("GET", "/item/{item_id}", "404") == 1
+    assert REQUESTS.get("GET", UNMATCHED_ROUTE, "404") == 1
+    assert REQUEST_LATENCY.count("GET", "/item/{item_id}") == 2
+    assert DB_QUERIES.get("INSERT") >= 1
+
+    response = test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'http_requests_total{method="POST",route="/item",status="201"} 1'
+        in response.text
+    )
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
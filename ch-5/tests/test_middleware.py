@@ -0,0 +1,7 @@
+import logging
+
+
+def test_requests_are_logged_with_status(test_client, caplog):
+    with caplog.at_level(logging.INFO, logger="client.logger"):
+        test_client.get("/item/999999")
+    assert "call: /item/999999, ip: testclient, status: 404" in caplog.text
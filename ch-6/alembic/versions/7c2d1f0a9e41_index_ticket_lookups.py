@@ -0,0 +1,39 @@
+"""Index ticket lookups
+
+Revision ID: 7c2d1f0a9e41
+Revises: e5b9f4e9cb88
+Create Date: 2026-10-19 16:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '7c2d1f0a9e41'
+down_revision: Union[str, None] = 'e5b9f4e9cb88'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_tickets_show'), 'tickets', ['show'], unique=False)
+    op.create_index(op.f('ix_tickets_event_id'), 'tickets', ['event_id'], unique=False)
+    # sold is only ever filtered together with event_id, a partial index
+    # keeps just the unsold rows and shrinks as an event sells out
+    op.create_index(
+        'ix_tickets_event_id_unsold',
+        'tickets',
+        ['event_id'],
+        unique=False,
+        sqlite_where=sa.text('sold = 0'),
+    )
+    op.create_index(op.f('ix_ticket_details_ticket_id'), 'ticket_details', ['ticket_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ticket_details_ticket_id'), table_name='ticket_details')
+    op.drop_index('ix_tickets_event_id_unsold', table_name='tickets')
+    op.drop_index(op.f('ix_tickets_event_id'), table_name='tickets')
+    op.drop_index(op.f('ix_tickets_show'), table_name='tickets')
@@ -0,0 +1,215 @@
+"""Per-event seat availability kept in memory as a bitmap.
+
+A SeatMap holds one bit per ticket of an event, in ticket id order, set
+while the ticket is still for sale. Maps are built from the database on
+first use and updated in place when this process sells a ticket, so
+polling clients never touch the database. Sales made by other processes
+are picked up when a map is rebuilt after SEAT_MAP_MAX_AGE seconds; each
+rebuild is compared with the map it replaces and any difference counted
+in seat_map_mismatches_total. Only one request rebuilds an event's map
+at a time; the others keep serving the old map meanwhile, or wait for
+the first build.
+
+Bit ``i`` is byte ``i // 8``, mask ``1 << (i % 8)``.
+"""
+import asyncio
+import os
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import Event, Ticket, TicketDetails
+from app.metrics import SEAT_MAP_MISMATCHES
+
+SEAT_MAP_MAX_AGE = float(os.getenv("SEAT_MAP_MAX_AGE", "30"))
+
+
+class SeatMap:
+    def __init__(self, event_id: int, rows):
+        """``rows`` are (ticket id, seat, sold) ordered by ticket id."""
+        self.event_id = event_id
+        self.ticket_ids: list[int] = []
+        self.seats: list[str | None] = []
+        self.bits = bytearray((len(rows) + 7) // 8)
+        for position, (ticket_id, seat, sold) in enumerate(rows):
+            self.ticket_ids.append(ticket_id)
+            self.seats.append(seat)
+            if not sold:
+                self.bits[position >> 3] |= 1 << (position & 7)
+        self.positions = {
+            ticket_id: position
+            for position, ticket_id in enumerate(self.ticket_ids)
+        }
+        self.built_at = time.monotonic()
+        self.version = 0
+        self._encoded: tuple[int, bytes] | None = None
+
+    def __len__(self) -> int:
+        return len(self.ticket_ids)
+
+    def is_available(self, ticket_id: int) -> bool:
+        position = self.positions[ticket_id]
+        return bool(self.bits[position >> 3] & (1 << (position & 7)))
+
+    def mark_unavailable(self, ticket_id: int) -> bool:
+        """Clear the ticket's bit, False if it was already clear."""
+        position = self.positions.get(ticket_id)
+        if position is None:
+            return False
+        mask = 1 << (position & 7)
+        if not self.bits[position >> 3] & mask:
+            return False
+        self.bits[position >> 3] &= ~mask
+        self.version += 1
+        return True
+
+    def available_count(self) -> int:
+        return sum(byte.bit_count() for byte in self.bits)
+
+    def to_bytes(self) -> bytes:
+        # encoded once per change, not once per poll
+        if self._encoded is None or self._encoded[0] != self.version:
+            self._encoded = (self.version, bytes(self.bits))
+        return self._encoded[1]
+
+    def runs(self) -> list[tuple[int, int]]:
+        """(first position, length) of each run of available seats."""
+        runs = []
+        start = None
+        for index, byte in enumerate(self.bits):
+            # whole bytes of sold or free seats are the common case
+            if byte == 0x00 and start is None:
+                continue
+            if byte == 0xFF and start is not None:
+                continue
+            for bit in range(8):
+                position = index * 8 + bit
+                if byte & (1 << bit):
+                    if start is None:
+                        start = position
+                elif start is not None:
+                    runs.append((start, position - start))
+                    start = None
+        if start is not None:
+            runs.append((start, len(self) - start))
+        return runs
+
+    def etag(self) -> str:
+        return f'"{self.event_id}-{int(self.built_at * 1000)}-{self.version}"'
+
+    def differences(self, other: "SeatMap") -> list[int]:
+        """Ticket ids whose availability differs between the two maps."""
+        if self.ticket_ids != other.ticket_ids:
+            return sorted(set(self.ticket_ids) ^ set(other.ticket_ids))
+        return [
+            ticket_id
+            for position, ticket_id in enumerate(self.ticket_ids)
+            if self.bits[position >> 3] != other.bits[position >> 3]
+            and self.is_available(ticket_id) != other.is_available(ticket_id)
+        ]
+
+
+async def load_seat_rows(db_session: AsyncSession, event_id: int):
+    query = (
+        select(Ticket.id, TicketDetails.seat, Ticket.sold)
+        .outerjoin(TicketDetails, TicketDetails.ticket_id == Ticket.id)
+        .where(Ticket.event_id == event_id)
+        .order_by(Ticket.id)
+    )
+    async with db_session as session:
+        result = await session.execute(query)
+        return result.all()
+
+
+async def event_exists(db_session: AsyncSession, event_id: int) -> bool:
+    async with db_session as session:
+        result = await session.execute(
+            select(Event.id).where(Event.id == event_id)
+        )
+        return result.first() is not None
+
+
+class SeatMapRegistry:
+    def __init__(self, max_age: float = SEAT_MAP_MAX_AGE):
+        self.max_age = max_age
+        self._maps: dict[int, SeatMap] = {}
+        self._events: dict[int, int] = {}  # ticket id -> event id
+        self._build_locks: dict[int, asyncio.Lock] = {}
+        # ticket ids sold while a map was being built, per build
+        self._sold_during_builds: list[set[int]] = []
+
+    async def get(
+        self, db_session: AsyncSession, event_id: int
+    ) -> SeatMap | None:
+        """The event's seat map, None if there is no such event."""
+        seat_map = self._maps.get(event_id)
+        if seat_map is not None and self._fresh(seat_map):
+            return seat_map
+        lock = self._build_locks.setdefault(event_id, asyncio.Lock())
+        if seat_map is not None and lock.locked():
+            # being rebuilt, a few more polls of the old map are fine
+            return seat_map
+        try:
+            async with lock:
+                # built by whoever held the lock before us
+                seat_map = self._maps.get(event_id)
+                if seat_map is not None and self._fresh(seat_map):
+                    return seat_map
+                return await self.rebuild(db_session, event_id)
+        finally:
+            # no lock kept around for ids that are not events
+            if event_id not in self._maps and not lock.locked():
+                self._build_locks.pop(event_id, None)
+
+    def _fresh(self, seat_map: SeatMap) -> bool:
+        return time.monotonic() - seat_map.built_at < self.max_age
+
+    async def rebuild(
+        self, db_session: AsyncSession, event_id: int
+    ) -> SeatMap | None:
+        sold = set()
+        self._sold_during_builds.append(sold)
+        try:
+            rows = await load_seat_rows(db_session, event_id)
+        finally:
+            self._sold_during_builds.remove(sold)
+        # no tickets may still be an event, only look it up then
+        if not rows and not await event_exists(db_session, event_id):
+            self._maps.pop(event_id, None)
+            return None
+        seat_map = SeatMap(event_id, rows)
+        # the query may have read rows from before these sales
+        for ticket_id in sold:
+            seat_map.mark_unavailable(ticket_id)
+        previous = self._maps.get(event_id)
+        if previous is not None:
+            mismatches = len(previous.differences(seat_map))
+            if mismatches:
+                SEAT_MAP_MISMATCHES.inc(amount=mismatches)
+        self._maps[event_id] = seat_map
+        self._events.update(dict.fromkeys(seat_map.ticket_ids, event_id))
+        return seat_map
+
+    async def check(self, db_session: AsyncSession, event_id: int) -> list[int]:
+        """Ticket ids where the cached map disagrees with the database."""
+        seat_map = self._maps.get(event_id)
+        if seat_map is None:
+            return []
+        current = SeatMap(event_id, await load_seat_rows(db_session, event_id))
+        return seat_map.differences(current)
+
+    def mark_unavailable(self, ticket_id: int):
+        for sold in self._sold_during_builds:
+            sold.add(ticket_id)
+        event_id = self._events.get(ticket_id)
+        if event_id is not None:
+            self._maps[event_id].mark_unavailable(ticket_id)
+
+    def clear(self):
+        self._maps.clear()
+        self._events.clear()
+        self._build_locks.clear()
+
+
+seat_maps = SeatMapRegistry()
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, null
+from sqlalchemy import ForeignKey, Index, null, text
 from sqlalchemy.orm import (
     DeclarativeBase,
     Mapped,
@@ -11,10 +11,18 @@ class Base(DeclarativeBase):
 
 class Ticket(Base):
     __tablename__ = "tickets"
+    __table_args__ = (
+        # unsold tickets of an event, what an on-sale looks up
+        Index(
+            "ix_tickets_event_id_unsold",
+            "event_id",
+            sqlite_where=text("sold = 0"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     price: Mapped[float] = mapped_column(nullable=True)
-    show: Mapped[str | None]
+    show: Mapped[str | None] = mapped_column(index=True)
     user: Mapped[str | None]
     sold: Mapped[bool] = mapped_column(default=False)
     # Add mapping to ticket_details table
@@ -22,7 +30,9 @@ class Ticket(Base):
         back_populates="ticket"
     )
     # Add mapping to events table
-    event_id: Mapped[int | None] = mapped_column(ForeignKey("events.id"))
+    event_id: Mapped[int | None] = mapped_column(
+        ForeignKey("events.id"), index=True
+    )
     event: Mapped["Event | None"] = relationship(
         back_populates="tickets"
     )
@@ -32,7 +42,7 @@ class TicketDetails(Base):
 
     id: Mapped[int] = mapped_column(primary_key=True)
     ticket_id: Mapped[int] = mapped_column(
-        ForeignKey("tickets.id")
+        ForeignKey("tickets.id"), index=True
     )
     ticket: Mapped["Ticket"] = relationship(
         back_populates="details"
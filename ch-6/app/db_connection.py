@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     create_async_engine,
@@ -8,6 +10,8 @@ from sqlalchemy.orm import sessionmaker
 SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./database.db"
 
 # Using DB URL, connect to a 
+# cached so the sessions, the lifespan and the metrics share one engine
+@lru_cache
 def get_engine():
     return create_async_engine(
         SQLALCHEMY_DATABASE_URL,
@@ -0,0 +1,148 @@
+"""Short-lived seat holds, so only confirmed purchases write to the DB.
+
+During an on-sale most buyers race for the same few tickets. A hold is
+taken in memory, without touching the database, and only its owner can
+turn it into a sale before it expires after HOLD_TTL seconds. Losers of
+the race are turned away by the registry instead of by a failed UPDATE,
+so the database sees roughly one write per ticket sold.
+
+Each user may hold at most MAX_HOLDS_PER_USER tickets at once, so a
+single client cannot park every seat for HOLD_TTL seconds; users are
+free-form strings, so this limits honest clients and casual abuse, not
+one that invents a new name per request.
+
+Expiry times are kept in a heap; expired holds are dropped lazily at the
+start of every registry call. Holds live in this process only, so run a
+single worker, or route each event to one, while an on-sale is open.
+"""
+import heapq
+import os
+import secrets
+import time
+from dataclasses import dataclass
+
+from app.metrics import HOLDS, HOLDS_ACTIVE
+
+HOLD_TTL = float(os.getenv("HOLD_TTL", "120"))
+MAX_HOLDS_PER_USER = int(os.getenv("MAX_HOLDS_PER_USER", "4"))
+
+
+class HoldLimitError(Exception):
+    """The user already holds the maximum number of tickets."""
+
+
+@dataclass(frozen=True, slots=True)
+class Hold:
+    ticket_id: int
+    user: str
+    token: str
+    expires_at: float
+
+    def expires_in(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+class HoldRegistry:
+    def __init__(
+        self,
+        ttl: float = HOLD_TTL,
+        max_per_user: int | None = MAX_HOLDS_PER_USER,
+    ):
+        self.ttl = ttl
+        self.max_per_user = max_per_user
+        self._holds: dict[int, Hold] = {}  # ticket id -> hold
+        self._per_user: dict[str, int] = {}
+        # (expires_at, ticket id, token), stale entries are skipped
+        self._expiry: list[tuple[float, int, str]] = []
+
+    def expire(self) -> int:
+        """Drop every hold past its expiry time, return how many."""
+        now = time.monotonic()
+        expired = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, ticket_id, token = heapq.heappop(self._expiry)
+            hold = self._holds.get(ticket_id)
+            if hold is not None and hold.token == token:
+                self._drop(hold)
+                expired += 1
+        if expired:
+            HOLDS.inc("expired", amount=expired)
+            HOLDS_ACTIVE.set(value=len(self._holds))
+        return expired
+
+    def place(self, ticket_id: int, user: str) -> Hold | None:
+        """Hold ``ticket_id`` for ``user``, None if someone else holds it.
+
+        Asking again for a ticket the user already holds returns that
+        hold, so a retried request does not lock the user out. Raises
+        HoldLimitError if the user already holds ``max_per_user``.
+        """
+        self.expire()
+        hold = self._holds.get(ticket_id)
+        if hold is not None:
+            if hold.user == user:
+                return hold
+            HOLDS.inc("rejected")
+            return None
+        held = self._per_user.get(user, 0)
+        if self.max_per_user is not None and held >= self.max_per_user:
+            HOLDS.inc("limited")
+            raise HoldLimitError(user)
+        hold = Hold(
+            ticket_id,
+            user,
+            secrets.token_urlsafe(16),
+            time.monotonic() + self.ttl,
+        )
+        self._holds[ticket_id] = hold
+        self._per_user[user] = held + 1
+        heapq.heappush(self._expiry, (hold.expires_at, ticket_id, hold.token))
+        HOLDS.inc("placed")
+        HOLDS_ACTIVE.set(value=len(self._holds))
+        return hold
+
+    def get(self, ticket_id: int, token: str) -> Hold | None:
+        """The live hold on ``ticket_id`` if ``token`` is its token."""
+        self.expire()
+        hold = self._holds.get(ticket_id)
+        if hold is None or not secrets.compare_digest(hold.token, token):
+            return None
+        return hold
+
+    def remove(self, hold: Hold):
+        # the hold may have expired and been replaced meanwhile
+        if self._holds.get(hold.ticket_id) == hold:
+            self._drop(hold)
+            HOLDS_ACTIVE.set(value=len(self._holds))
+
+    def _drop(self, hold: Hold):
+        del self._holds[hold.ticket_id]
+        held = self._per_user[hold.user] - 1
+        if held:
+            self._per_user[hold.user] = held
+        else:
+            del self._per_user[hold.user]
+
+    def release(self, ticket_id: int, token: str) -> bool:
+        hold = self.get(ticket_id, token)
+        if hold is None:
+            return False
+        self.remove(hold)
+        HOLDS.inc("released")
+        return True
+
+    def held(self, ticket_id: int) -> bool:
+        self.expire()
+        return ticket_id in self._holds
+
+    def __len__(self) -> int:
+        return len(self._holds)
+
+    def clear(self):
+        self._holds.clear()
+        self._per_user.clear()
+        self._expiry.clear()
+        HOLDS_ACTIVE.set(value=0)
+
+
+holds = HoldRegistry()
@@ -1,23 +1,29 @@
+import json
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Depends, HTTPException, status
-from typing import Annotated
+from fastapi import FastAPI, Depends, HTTPException, Request, Response, status
+from typing import Annotated, Literal
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.schemas import (
     TicketRequest, TicketUpdateRequest, TicketDetailsUpateRequest,
-    TicketResponse
+    TicketResponse, HoldRequest, HoldResponse, HoldConfirmRequest
 )
 
+from app.availability import seat_maps
 from app.db import Base
+from app.holds import HoldLimitError, holds
 from app.db_connection import (
     AsyncSessionLocal,
     get_db_session,
     get_engine,
 )
+from app.metrics import HOLDS, instrument_engine
+from app.prometheus import MetricsMiddleware, metrics_endpoint
 from app.operations import (
     create_ticket,
     delete_ticket,
     get_ticket,
+    sell_ticket_to_user,
     update_ticket_price,
 )
 
@@ -31,6 +37,9 @@ async def lifespan(app: FastAPI):
     await engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+instrument_engine(get_engine())
 
 @app.post("/ticket", response_model=dict[str, int])
 async def create_ticket_route(
@@ -174,4 +183,123 @@ async def register_sponsor_amount_contribution(
             detail="Contribution not registered",
         )
 
-    return {"detail": "Contribution registered"}
\ No newline at end of file
+    return {"detail": "Contribution registered"}
+
+
+@app.get("/event/{event_id}/availability")
+async def get_event_availability_route(
+    db_session: Annotated[
+        AsyncSession, Depends(get_db_session)
+    ],
+    request: Request,
+    event_id: int,
+    encoding: Literal["bitmap", "runs"] = "bitmap",
+):
+    seat_map = await seat_maps.get(db_session, event_id)
+    if seat_map is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found",
+        )
+    headers = {
+        "ETag": seat_map.etag(),
+        "Cache-Control": "no-cache",
+        "X-Seat-Count": str(len(seat_map)),
+    }
+    if request.headers.get("if-none-match") == seat_map.etag():
+        return Response(status_code=304, headers=headers)
+    if encoding == "runs":
+        return Response(
+            json.dumps({
+                "seats": len(seat_map),
+                "available": seat_map.runs(),
+            }),
+            media_type="application/json",
+            headers=headers,
+        )
+    # bit i, in ticket id order, is set while the i-th seat is for sale
+    return Response(
+        seat_map.to_bytes(),
+        media_type="application/octet-stream",
+        headers=headers,
+    )
+
+
+@app.get("/event/{event_id}/seats")
+async def get_event_seats_route(
+    db_session: Annotated[
+        AsyncSession, Depends(get_db_session)
+    ],
+    event_id: int,
+):
+    seat_map = await seat_maps.get(db_session, event_id)
+    if seat_map is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Event not found",
+        )
+    # what each position of the availability bitmap refers to
+    return {"ticket_ids": seat_map.ticket_ids, "seats": seat_map.seats}
+
+
+@app.post(
+    "/ticket/{ticket_id}/hold",
+    response_model=HoldResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def hold_ticket_route(
+    db_session: Annotated[
+        AsyncSession, Depends(get_db_session)
+    ],
+    ticket_id: int,
+    hold_request: HoldRequest,
+):
+    # a read, SQLite serializes writers only
+    ticket = await get_ticket(db_session, ticket_id)
+    if not ticket:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ticket not found")
+    if ticket.sold:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ticket already sold")
+    try:
+        hold = holds.place(ticket_id, hold_request.user)
+    except HoldLimitError:
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many tickets held, confirm or release one first")
+    if hold is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ticket is held by another user")
+    return HoldResponse(
+        ticket_id=ticket_id,
+        hold_token=hold.token,
+        expires_in=hold.expires_in(),
+    )
+
+
+@app.post("/ticket/{ticket_id}/hold/confirm")
+async def confirm_ticket_hold_route(
+    db_session: Annotated[
+        AsyncSession, Depends(get_db_session)
+    ],
+    ticket_id: int,
+    confirm_request: HoldConfirmRequest,
+):
+    hold = holds.get(ticket_id, confirm_request.hold_token)
+    if hold is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hold not found or expired")
+    # the hold keeps other buyers off the ticket until the write is done
+    try:
+        sold = await sell_ticket_to_user(db_session, ticket_id, hold.user)
+    finally:
+        holds.remove(hold)
+    if not sold:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Ticket already sold")
+    HOLDS.inc("confirmed")
+    return {"detail": "Ticket sold successfully"}
+
+
+@app.delete("/ticket/{ticket_id}/hold")
+async def release_ticket_hold_route(
+    ticket_id: int,
+    hold_token: str,
+):
+    if not holds.release(ticket_id, hold_token):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Hold not found or expired")
+    return {"detail": "Hold released"}
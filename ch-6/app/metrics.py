@@ -0,0 +1,71 @@
+"""Database, seat map and ticket hold metrics of this app.
+
+The collectors, the registry, the request middleware and the /metrics
+endpoint are in app.prometheus, vendored unchanged from ch-5; this
+module only adds what ch-6 measures on top of them.
+"""
+import time
+
+from sqlalchemy import event
+
+from app.prometheus import Counter, Gauge, Histogram, registry
+
+DB_QUERIES = registry.register(Counter(
+    "db_queries_total",
+    "SQL statements executed.",
+    ("statement",),
+))
+DB_QUERY_LATENCY = registry.register(Histogram(
+    "db_query_duration_seconds",
+    "SQL statement latency.",
+    ("statement",),
+))
+DB_CONNECTIONS_CHECKED_OUT = registry.register(Gauge(
+    "db_pool_connections_checked_out",
+    "Connections currently checked out of the pool.",
+))
+SEAT_MAP_MISMATCHES = registry.register(Counter(
+    "seat_map_mismatches_total",
+    "Seats whose cached availability differed from the database"
+    " when the event's seat map was rebuilt.",
+))
+HOLDS = registry.register(Counter(
+    "ticket_holds_total",
+    "Ticket hold outcomes: placed, rejected, limited, confirmed,"
+    " released, expired.",
+    ("result",),
+))
+HOLDS_ACTIVE = registry.register(Gauge(
+    "ticket_holds_active",
+    "Ticket holds currently live in this process.",
+))
+
+
+def instrument_engine(engine):
+    """Count and time every statement, and track pool checkouts."""
+    engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, many):
+        duration = time.perf_counter() - conn.info["query_start"].pop()
+        kind = statement.lstrip().split(None, 1)[0].upper()
+        DB_QUERIES.inc(kind)
+        DB_QUERY_LATENCY.observe(duration, kind)
+
+    @event.listens_for(engine, "handle_error")
+    def drop_timer(exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("query_start"):
+            connection.info["query_start"].pop()
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_CONNECTIONS_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        DB_CONNECTIONS_CHECKED_OUT.dec()
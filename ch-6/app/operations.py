@@ -1,9 +1,9 @@
-from re import A
-from turtle import update
+from sqlalchemy import and_, delete, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy.orm import load_only, selectinload
 
+from app.availability import seat_maps
 from app.db import Ticket, TicketDetails, Event, Sponsor, Sponsorship
 from app.db import Base
 
@@ -62,6 +62,8 @@ async def delete_ticket(
         await session.commit()
         if tickets_removed.rowcount == 0:
             return False
+        # a deleted ticket can no longer be sold
+        seat_maps.mark_unavailable(ticket_id)
         return True
 
 async def update_ticket_price(
@@ -199,9 +201,11 @@ async def get_event(
     query = (
         select(Event)
         .where(Event.id == event_id)
+        # a second query by primary key; SQLite scans sponsorships
+        # for the nested outer join a joinedload would emit
         .options(
-            joinedload(Event.sponsors)
-        )  # check to remove select in load
+            selectinload(Event.sponsors)
+        )
     )
     async with db_session as session:
         result = await session.execute(query)
@@ -213,7 +217,7 @@ async def get_events_with_sponsors(
     db_session: AsyncSession,
     ) -> list[Event]:
     query = select(Event).options(
-        joinedload(Event.sponsors)
+        selectinload(Event.sponsors)
     )
     async with db_session as session:
         result = await session.execute(query)
@@ -275,4 +279,5 @@ async def sell_ticket_to_user(
         await session.commit()
         if result.rowcount == 0:
             return False
+    seat_maps.mark_unavailable(ticket_id)
     return True
@@ -14,4 +14,15 @@ class TicketUpdateRequest(BaseModel):
     price: float | None = Field(None, ge=0)
 
 class TicketResponse(TicketRequest):
-    id: int
\ No newline at end of file
+    id: int
+
+class HoldRequest(BaseModel):
+    user: str
+
+class HoldResponse(BaseModel):
+    ticket_id: int
+    hold_token: str
+    expires_in: float
+
+class HoldConfirmRequest(BaseModel):
+    hold_token: str
@@ -0,0 +1,177 @@
+"""Database writes and failed purchases during a simulated on-sale.
+
+BUYERS buyers, CONCURRENCY at a time, each try up to ATTEMPTS seats of
+a SEATS seat event until they get one, with HOT_SHARE of the picks going
+to the HOT_SEATS best seats. Two flows are compared on a fresh
+migrated SQLite file each:
+
+- direct: every attempt is sell_ticket_to_user, an UPDATE that fails
+  when someone else got there first;
+- holds: an attempt reads the ticket and takes an in-memory hold, and
+  only a successful hold is confirmed with sell_ticket_to_user, as the
+  /ticket/{id}/hold and /hold/confirm routes do.
+
+The holds flow is also run with a hoarder that holds as many seats as
+it can before the sale opens and never confirms, once without a
+per-user cap and once with MAX_HOLDS_PER_USER.
+
+Reports UPDATEs sent, the share of attempts that failed, the share of
+buyers left without a ticket, "database is locked" errors and wall
+time. Holds cut the UPDATEs to one per sale, but with honest
+single-ticket buyers they do not lower the failed-attempt rate: buyers
+still pick the same taken seats, they are just turned away by a read
+and an in-memory check. Failure rates drop only against hoarding,
+where the per-user cap keeps seats on sale.
+
+Run from ch-6 with: python -m benchmarks.bench_on_sale [buyers]
+"""
+import asyncio
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.holds import MAX_HOLDS_PER_USER, HoldLimitError, HoldRegistry
+from app.operations import create_event, get_ticket, sell_ticket_to_user
+
+SEATS = 500
+HOT_SEATS = 50
+HOT_SHARE = 0.8
+BUYERS = 5_000
+ATTEMPTS = 3
+CONCURRENCY = 200
+ALEMBIC_DIR = Path(__file__).parents[1] / "alembic"
+
+logging.getLogger("alembic").setLevel(logging.WARNING)
+
+
+def migrate(path: Path):
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{path}")
+    command.upgrade(config, "head")
+
+
+class Stats:
+    def __init__(self):
+        self.updates = 0
+        self.sold = 0
+        self.attempts = 0
+        self.failed_attempts = 0
+        self.locked = 0
+
+
+async def on_sale(
+    flow: str,
+    buyers: int,
+    path: Path,
+    hoarder: bool = False,
+    max_per_user: int | None = MAX_HOLDS_PER_USER,
+) -> tuple[Stats, float]:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{path}", pool_size=20, max_overflow=0
+    )
+    sessions = async_sessionmaker(engine, class_=AsyncSession)
+    event_id = await create_event(sessions(), "On-sale", SEATS)
+    # create_event numbers tickets from 1 in a fresh database
+    ticket_ids = list(range(1, SEATS + 1))
+    stats = Stats()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_updates(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE"):
+            stats.updates += 1
+
+    holds = HoldRegistry(ttl=60, max_per_user=max_per_user)
+    if hoarder:
+        for ticket_id in ticket_ids:
+            try:
+                holds.place(ticket_id, "hoarder")
+            except HoldLimitError:
+                break
+    slots = asyncio.Semaphore(CONCURRENCY)
+    rng = random.Random(0)
+
+    def pick() -> int:
+        if rng.random() < HOT_SHARE:
+            return rng.choice(ticket_ids[:HOT_SEATS])
+        return rng.choice(ticket_ids)
+
+    async def attempt(ticket_id: int, user: str) -> bool:
+        if flow == "holds":
+            ticket = await get_ticket(sessions(), ticket_id)
+            if ticket.sold:
+                return False
+            hold = holds.place(ticket_id, user)
+            if hold is None:
+                return False
+            try:
+                return await sell_ticket_to_user(sessions(), ticket_id, user)
+            finally:
+                holds.remove(hold)
+        return await sell_ticket_to_user(sessions(), ticket_id, user)
+
+    async def buyer(n: int):
+        async with slots:
+            for _ in range(ATTEMPTS):
+                stats.attempts += 1
+                try:
+                    if await attempt(pick(), f"buyer-{n}"):
+                        stats.sold += 1
+                        return
+                except OperationalError:
+                    stats.locked += 1
+                stats.failed_attempts += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(buyer(n) for n in range(buyers)))
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    assert event_id == 1
+    return stats, elapsed
+
+
+SCENARIOS = (
+    ("direct", "direct", {}),
+    ("holds", "holds", {}),
+    ("hoarder, no cap", "holds", {"hoarder": True, "max_per_user": None}),
+    (
+        f"hoarder, cap {MAX_HOLDS_PER_USER}",
+        "holds",
+        {"hoarder": True},
+    ),
+)
+
+
+async def main(buyers: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        for n, (label, flow, options) in enumerate(SCENARIOS):
+            path = Path(tmp) / f"{n}.db"
+            migrate(path)
+            stats, elapsed = await on_sale(flow, buyers, path, **options)
+            print(
+                f"{label:<16} {stats.sold:5} sold"
+                f"  {stats.updates:6} UPDATEs"
+                f"  {stats.updates / max(stats.sold, 1):5.2f} per sale"
+                f"  {stats.failed_attempts / stats.attempts:6.1%} attempts"
+                f" failed"
+                f"  {1 - stats.sold / buyers:6.1%} buyers without"
+                f"  {stats.locked:4} locked"
+                f"  {elapsed:6.2f} s"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else BUYERS))
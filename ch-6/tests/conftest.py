@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool
+
+from app.availability import seat_maps
+from app.db_connection import get_db_session
+from app.main import app
+
+ALEMBIC_DIR = Path(__file__).parents[1] / "alembic"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """A database file migrated to the latest alembic revision."""
+    path = tmp_path / "database.db"
+    config = Config()
+    config.set_main_option("script_location", str(ALEMBIC_DIR))
+    config.set_main_option("sqlalchemy.url", f"sqlite:///{path}")
+    command.upgrade(config, "head")
+    return path
+
+
+@pytest.fixture
+def session_factory(db_path):
+    # NullPool, the test client runs requests on its own event loop
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool
+    )
+    return async_sessionmaker(engine, class_=AsyncSession)
+
+
+@pytest.fixture
+def override_db_session(session_factory):
+    async def get_test_db_session():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db_session] = get_test_db_session
+    yield
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_seat_maps():
+    yield
+    seat_maps.clear()
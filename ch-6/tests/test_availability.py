@@ -0,0 +1,156 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import availability, operations
+from app.availability import SeatMap, SeatMapRegistry, seat_maps
+from app.main import app
+from app.metrics import SEAT_MAP_MISMATCHES
+
+
+def test_seat_map_bits_and_runs():
+    rows = [(10 + n, f"{n}A", n in (3, 4, 9)) for n in range(12)]
+    seat_map = SeatMap(1, rows)
+    assert seat_map.to_bytes() == bytes([0b11100111, 0b00001101])
+    assert seat_map.runs() == [(0, 3), (5, 4), (10, 2)]
+    assert seat_map.available_count() == 9
+
+    assert seat_map.mark_unavailable(10)
+    assert not seat_map.mark_unavailable(10)
+    assert not seat_map.is_available(10)
+    assert seat_map.runs() == [(1, 2), (5, 4), (10, 2)]
+    assert seat_map.version == 1
+
+
+def test_sales_update_the_cached_map(session_factory):
+    async def scenario():
+        event_id = await operations.create_event(
+            session_factory(), "Opera", 20
+        )
+        seat_map = await seat_maps.get(session_factory(), event_id)
+        first, second = seat_map.ticket_ids[:2]
+        assert await operations.sell_ticket_to_user(
+            session_factory(), first, "ann"
+        )
+        assert await operations.delete_ticket(session_factory(), second)
+        return seat_map, first, second, await seat_maps.check(
+            session_factory(), event_id
+        )
+
+    seat_map, sold, deleted, mismatched = asyncio.run(scenario())
+    assert not seat_map.is_available(sold)
+    assert not seat_map.is_available(deleted)
+    assert seat_map.available_count() == 18
+    # the map keeps a deleted ticket's position until it is rebuilt
+    assert mismatched == [deleted]
+
+
+def test_rebuild_counts_sales_made_elsewhere(session_factory):
+    SEAT_MAP_MISMATCHES.clear()
+
+    async def scenario():
+        event_id = await operations.create_event(
+            session_factory(), "Opera", 5
+        )
+        seat_map = await seat_maps.get(session_factory(), event_id)
+        # a sale by another process, invisible to this one's map
+        await operations.update_ticket(
+            session_factory(), seat_map.ticket_ids[0], {"sold": True}
+        )
+        assert await seat_maps.check(session_factory(), event_id) == [
+            seat_map.ticket_ids[0]
+        ]
+        return await seat_maps.rebuild(session_factory(), event_id)
+
+    rebuilt = asyncio.run(scenario())
+    assert rebuilt.available_count() == 4
+    assert SEAT_MAP_MISMATCHES.get() == 1
+
+
+def test_concurrent_gets_share_one_rebuild(session_factory, monkeypatch):
+    loads = []
+    load_seat_rows = availability.load_seat_rows
+
+    async def counting_load(db_session, event_id):
+        loads.append(event_id)
+        # let the other callers reach the registry meanwhile
+        await asyncio.sleep(0.01)
+        return await load_seat_rows(db_session, event_id)
+
+    monkeypatch.setattr(availability, "load_seat_rows", counting_load)
+    registry = SeatMapRegistry()
+
+    async def poll(n):
+        return await asyncio.gather(*(
+            registry.get(session_factory(), event_id) for _ in range(n)
+        ))
+
+    event_id = asyncio.run(
+        operations.create_event(session_factory(), "Opera", 5)
+    )
+    first = asyncio.run(poll(10))
+    assert loads == [event_id]
+    assert all(seat_map is first[0] for seat_map in first)
+
+    registry.max_age = 0
+    second = asyncio.run(poll(10))
+    assert loads == [event_id, event_id]
+    # the stale map is served while one caller rebuilds it
+    assert second[0] is not first[0]
+    assert all(seat_map is first[0] for seat_map in second[1:])
+
+
+def test_availability_endpoint(session_factory, override_db_session):
+    event_id = asyncio.run(
+        operations.create_event(session_factory(), "Opera", 10)
+    )
+    client = TestClient(app)
+
+    response = client.get(f"/event/{event_id}/availability")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["x-seat-count"] == "10"
+    assert response.content == bytes([0xFF, 0x03])
+
+    etag = response.headers["etag"]
+    response = client.get(
+        f"/event/{event_id}/availability", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    seats = client.get(f"/event/{event_id}/seats").json()
+    asyncio.run(operations.sell_ticket_to_user(
+        session_factory(), seats["ticket_ids"][2], "ann"
+    ))
+    response = client.get(
+        f"/event/{event_id}/availability",
+        params={"encoding": "runs"},
+        headers={"If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert response.json() == {"seats": 10, "available": [[0, 2], [3, 7]]}
+    assert seats["seats"][:3] == ["0A", "1A", "2A"]
+
+    assert client.get("/event/999/availability").status_code == 404
+    assert client.get("/event/999/seats").status_code == 404
+
+
+def test_event_without_tickets_has_an_empty_map(
+    session_factory, override_db_session
+):
+    event_id = asyncio.run(
+        operations.create_event(session_factory(), "Rehearsal", 0)
+    )
+    client = TestClient(app)
+
+    response = client.get(f"/event/{event_id}/availability")
+    assert response.status_code == 200
+    assert response.content == b""
+    assert response.headers["x-seat-count"] == "0"
+    response = client.get(
+        f"/event/{event_id}/availability", params={"encoding": "runs"}
+    )
+    assert response.json() == {"seats": 0, "available": []}
+    assert client.get(f"/event/{event_id}/seats").json() == {
+        "ticket_ids": [], "seats": []
+    }
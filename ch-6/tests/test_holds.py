@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import holds as holds_module
+from app import operations
+from app.holds import HoldLimitError, HoldRegistry, holds
+from app.main import app
+from app.metrics import HOLDS
+
+
+@pytest.fixture(autouse=True)
+def clear_holds():
+    HOLDS.clear()
+    yield
+    holds.clear()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(holds_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_hold_excludes_other_users_until_it_expires(clock):
+    registry = HoldRegistry(ttl=60)
+    hold = registry.place(1, "ann")
+    assert registry.place(1, "bob") is None
+    assert registry.place(1, "ann") == hold
+
+    clock[0] += 61
+    assert not registry.held(1)
+    assert registry.get(1, hold.token) is None
+    assert registry.place(1, "bob").user == "bob"
+    assert HOLDS.get("expired") == 1
+
+
+def test_holds_per_user_are_capped(clock):
+    registry = HoldRegistry(ttl=60, max_per_user=2)
+    first = registry.place(1, "ann")
+    registry.place(2, "ann")
+    with pytest.raises(HoldLimitError):
+        registry.place(3, "ann")
+    # the cap is per user, and retrying a held ticket is not a new hold
+    assert registry.place(3, "bob") is not None
+    assert registry.place(1, "ann") == first
+
+    registry.remove(first)
+    assert registry.place(3, "ann") is None
+    assert registry.place(4, "ann") is not None
+    clock[0] += 61
+    assert registry.place(5, "ann") is not None
+    assert HOLDS.get("limited") == 1
+
+
+def test_expiry_skips_holds_released_and_replaced(clock):
+    registry = HoldRegistry(ttl=60)
+    first = registry.place(1, "ann")
+    assert registry.release(1, first.token)
+    clock[0] += 30
+    second = registry.place(1, "bob")
+    clock[0] += 31
+    # the heap entry of the first hold must not drop the second
+    assert registry.expire() == 0
+    assert registry.get(1, "not-the-token") is None
+    registry.remove(first)
+    assert registry.get(1, second.token) == second
+
+
+def test_hold_and_confirm_sell_the_ticket(
+    session_factory, override_db_session
+):
+    event_id = asyncio.run(
+        operations.create_event(session_factory(), "Opera", 2)
+    )
+    client = TestClient(app)
+    ticket_id = client.get(f"/event/{event_id}/seats").json()["ticket_ids"][0]
+
+    response = client.post(f"/ticket/{ticket_id}/hold", json={"user": "ann"})
+    assert response.status_code == 201
+    token = response.json()["hold_token"]
+    response = client.post(f"/ticket/{ticket_id}/hold", json={"user": "bob"})
+    assert response.status_code == 409
+
+    response = client.post(
+        f"/ticket/{ticket_id}/hold/confirm", json={"hold_token": "wrong"}
+    )
+    assert response.status_code == 404
+    response = client.post(
+        f"/ticket/{ticket_id}/hold/confirm", json={"hold_token": token}
+    )
+    assert response.status_code == 200
+
+    ticket = asyncio.run(operations.get_ticket(session_factory(), ticket_id))
+    assert ticket.sold and ticket.user == "ann"
+    availability = client.get(f"/event/{event_id}/availability")
+    assert availability.content == bytes([0b10])
+    response = client.post(f"/ticket/{ticket_id}/hold", json={"user": "bob"})
+    assert response.status_code == 409
+    assert HOLDS.get("confirmed") == 1
+
+
+def test_released_hold_frees_the_ticket(session_factory, override_db_session):
+    ticket_id = asyncio.run(
+        operations.create_ticket(session_factory(), "Opera", None, 10.0)
+    )
+    client = TestClient(app)
+    token = client.post(
+        f"/ticket/{ticket_id}/hold", json={"user": "ann"}
+    ).json()["hold_token"]
+    response = client.delete(
+        f"/ticket/{ticket_id}/hold", params={"hold_token": token}
+    )
+    assert response.status_code == 200
+    response = client.post(f"/ticket/{ticket_id}/hold", json={"user": "bob"})
+    assert response.status_code == 201
+
+
+def test_hold_cap_returns_429(
+    session_factory, override_db_session, monkeypatch
+):
+    monkeypatch.setattr(holds, "max_per_user", 1)
+    event_id = asyncio.run(
+        operations.create_event(session_factory(), "Opera", 2)
+    )
+    client = TestClient(app)
+    first, second = client.get(f"/event/{event_id}/seats").json()["ticket_ids"]
+    response = client.post(f"/ticket/{first}/hold", json={"user": "ann"})
+    assert response.status_code == 201
+    response = client.post(f"/ticket/{second}/hold", json={"user": "ann"})
+    assert response.status_code == 429
@@ -0,0 +1,100 @@
+"""Every query the app sends is checked with EXPLAIN QUERY PLAN.
+
+The schema comes from running the alembic migrations, so a missing
+index migration fails here even if the models declare the index.
+"""
+import asyncio
+import sqlite3
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app import availability, operations
+from app.db import Sponsor
+
+# tables a query may read in full, per operation
+SCANS_ALLOWED = {
+    # lists every event, there is nothing to filter on
+    "get_events_with_sponsors": {"events"},
+}
+
+
+async def run_operations(db_path) -> list[tuple[str, str, tuple]]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    sessions = async_sessionmaker(engine, class_=AsyncSession)
+    async with sessions() as session:
+        await session.execute(insert(Sponsor).values(id=1, name="Acme"))
+        await session.commit()
+
+    executed = []
+    current = None
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            executed.append((current, statement, parameters))
+
+    async def call(operation, *args):
+        nonlocal current
+        current = operation.__name__
+        return await operation(sessions(), *args)
+
+    event_id = await call(operations.create_event, "Opera", 3)
+    ticket_id = await call(operations.create_ticket, "Opera", "ann", 10.0)
+    await call(operations.get_ticket, ticket_id)
+    await call(operations.get_all_tickets_for_show, "Opera")
+    await call(operations.update_ticket_price, ticket_id, 12.0)
+    await call(operations.update_ticket, ticket_id, {"price": 15.0})
+    await call(
+        operations.update_ticket_details, ticket_id, {"seat": "1B"}
+    )
+    await call(operations.sell_ticket_to_user, ticket_id, "bob")
+    await call(operations.add_sponsor_to_event, event_id, 1, 100.0)
+    await call(operations.get_event, event_id)
+    await call(operations.get_events_with_sponsors)
+    await call(operations.get_event_sponsorships_with_amount, event_id)
+    await call(operations.get_events_tickets_with_user_price, event_id)
+    await call(availability.load_seat_rows, event_id)
+    await call(availability.event_exists, event_id)
+    await call(operations.delete_ticket, ticket_id)
+    await engine.dispose()
+    return executed
+
+
+def test_every_operation_query_uses_an_index(db_path):
+    executed = asyncio.run(run_operations(db_path))
+    assert {name for name, _, _ in executed} >= {
+        "get_all_tickets_for_show",
+        "update_ticket_details",
+        "get_events_tickets_with_user_price",
+        "load_seat_rows",
+        "event_exists",
+    }
+
+    scans = []
+    with sqlite3.connect(db_path) as conn:
+        for name, statement, parameters in executed:
+            plan = conn.execute(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            ).fetchall()
+            for *_, detail in plan:
+                if not detail.startswith("SCAN "):
+                    continue
+                table = detail.split()[1]
+                if table not in SCANS_ALLOWED.get(name, ()):
+                    scans.append(f"{name}: {detail}\n  {statement}")
+    assert not scans, "\n".join(scans)
+
+
+def test_unsold_tickets_of_an_event_use_the_partial_index(db_path):
+    with sqlite3.connect(db_path) as conn:
+        [(*_, detail)] = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM tickets"
+            " WHERE event_id = ? AND sold = 0",
+            (1,),
+        ).fetchall()
+    assert "ix_tickets_event_id_unsold" in detail
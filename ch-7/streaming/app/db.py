@@ -2,9 +2,14 @@ from motor.motor_asyncio import AsyncIOMotorClient
 
 import logging
 
+from app.metrics import MongoCommandListener
+
 logger = logging.getLogger("uvicorn.error")
 
-mongo_client = AsyncIOMotorClient("mongodb://localhost:27017")
+mongo_client = AsyncIOMotorClient(
+    "mongodb://localhost:27017",
+    event_listeners=[MongoCommandListener()],
+)
 
 async def ping_mongo_db_server():
     try:
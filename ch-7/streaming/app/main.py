@@ -8,6 +8,7 @@ from bson import ObjectId
 
 from app.db import ping_mongo_db_server
 from app.models import mongo_database
+from app.prometheus import MetricsMiddleware, metrics_endpoint
 from app.schemas import PlayList
 
 logger = logging.getLogger("uvicorn.error")
@@ -24,6 +25,8 @@ async def lifespan(app: FastAPI):
     yield
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 
 @app.post("/song")
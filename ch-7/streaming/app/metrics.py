@@ -0,0 +1,40 @@
+"""MongoDB command metrics of this app.
+
+The collectors, the registry, the request middleware and the /metrics
+endpoint are in app.prometheus, vendored unchanged from ch-5; this
+module only adds the driver's command events on top of them. They are
+reported from Motor's worker threads.
+"""
+from pymongo import monitoring
+
+from app.prometheus import Counter, Histogram, registry
+
+MONGO_COMMANDS = registry.register(Counter(
+    "mongo_commands_total",
+    "MongoDB commands sent.",
+    ("command", "outcome"),
+))
+MONGO_COMMAND_LATENCY = registry.register(Histogram(
+    "mongo_command_duration_seconds",
+    "MongoDB command latency as reported by the driver.",
+    ("command",),
+))
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Pass to the Motor client with ``event_listeners=[...]``."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMANDS.inc(event.command_name, "succeeded")
+        MONGO_COMMAND_LATENCY.observe(
+            event.duration_micros / 1_000_000, event.command_name
+        )
+
+    def failed(self, event):
+        MONGO_COMMANDS.inc(event.command_name, "failed")
+        MONGO_COMMAND_LATENCY.observe(
+            event.duration_micros / 1_000_000, event.command_name
+        )
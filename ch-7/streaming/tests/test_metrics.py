@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db import mongo_client
+from app.main import app
+from app.metrics import (
+    MONGO_COMMAND_LATENCY,
+    MONGO_COMMANDS,
+    MongoCommandListener,
+)
+from app.prometheus import registry
+
+
+def command_event(command_name, duration_micros=0):
+    # the listener only reads these two attributes of pymongo's events
+    return SimpleNamespace(
+        command_name=command_name, duration_micros=duration_micros
+    )
+
+
+def test_client_reports_to_the_listener():
+    assert any(
+        isinstance(listener, MongoCommandListener)
+        for listener in mongo_client.options.event_listeners
+    )
+
+
+def test_listener_counts_and_times_commands():
+    registry.clear()
+    listener = MongoCommandListener()
+    listener.started(command_event("find"))
+    listener.succeeded(command_event("find", 1_500))
+    listener.succeeded(command_event("find", 30_000))
+    listener.failed(command_event("insert", 2_000_000))
+
+    assert MONGO_COMMANDS.get("find", "succeeded") == 2
+    assert MONGO_COMMANDS.get("insert", "failed") == 1
+    assert MONGO_COMMAND_LATENCY.count("find") == 2
+    assert MONGO_COMMAND_LATENCY.series[("find",)][-1] == pytest.approx(0.0315)
+
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200
+    assert (
+        'mongo_commands_total{command="insert",outcome="failed"} 1'
+        in response.text
+    )
+    assert (
+        'mongo_command_duration_seconds_bucket{command="find",le="0.0025"} 1'
+        in response.text
+    )
@@ -1,10 +1,160 @@
 import asyncio
 import logging
+import os
+import time
+from contextlib import asynccontextmanager
 
 logger = logging.getLogger("uvicorn.error")
 
+# seconds, simulated round trip to the external database
+EXTERNAL_DB_LATENCY = 2
+QUERY_BATCH_SIZE = int(os.getenv("QUERY_BATCH_SIZE", "500"))
+QUERY_BATCH_DELAY = float(os.getenv("QUERY_BATCH_DELAY", "0.2"))
+QUERY_BUFFER_SIZE = int(os.getenv("QUERY_BUFFER_SIZE", "5000"))
+# batches written at once, caps round trips to the external database
+QUERY_MAX_FLUSHES = int(os.getenv("QUERY_MAX_FLUSHES", "4"))
+
 
 async def store_query_to_external_db(message: str):
     logger.info(f"Storing message '{message}'.")
-    await asyncio.sleep(2)
-    logger.info(f"Message '{message}' stored!")
\ No newline at end of file
+    await asyncio.sleep(EXTERNAL_DB_LATENCY)
+    logger.info(f"Message '{message}' stored!")
+
+
+async def store_queries_to_external_db(messages: list[str]):
+    # one round trip for the whole batch
+    logger.info("Storing %d messages.", len(messages))
+    await asyncio.sleep(EXTERNAL_DB_LATENCY)
+    logger.info("%d messages stored!", len(messages))
+
+
+class WriteBehindBuffer:
+    """Coalesces items and writes them with one ``flush`` call per batch.
+
+    A batch is flushed once it holds ``max_batch`` items or its oldest
+    item has waited ``max_delay`` seconds. At most ``max_pending`` items
+    are buffered or being flushed; ``add`` and ``submit`` wait for room,
+    which pushes back on producers instead of growing memory.
+    """
+
+    def __init__(
+        self,
+        flush,
+        max_batch: int = QUERY_BATCH_SIZE,
+        max_delay: float = QUERY_BATCH_DELAY,
+        max_pending: int = QUERY_BUFFER_SIZE,
+        max_flushes: int = QUERY_MAX_FLUSHES,
+    ):
+        self.flush = flush
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_flushes = max_flushes
+        self._room = asyncio.Semaphore(max_pending)
+        self._flush_slots = asyncio.Semaphore(max_flushes)
+        self._items: list = []
+        self._waiters: list[asyncio.Future | None] = []
+        self._batch_started = 0.0
+        self._wakeup = asyncio.Event()
+        self._flushes: set[asyncio.Task] = set()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self.flushed = 0
+        self.failed = 0
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def add(self, item):
+        """Buffer ``item`` without waiting for it to be written."""
+        await self._append(item, None)
+
+    async def submit(self, item):
+        """Buffer ``item`` and wait until its batch has been written."""
+        future = asyncio.get_running_loop().create_future()
+        await self._append(item, future)
+        await future
+
+    async def _append(self, item, future):
+        if self._closing:
+            raise RuntimeError("buffer is closed")
+        await self._room.acquire()
+        if self._task is not None and self._task.done():
+            # closed and drained while this call waited for room
+            self._room.release()
+            raise RuntimeError("buffer is closed")
+        if not self._items:
+            self._batch_started = time.monotonic()
+        self._items.append(item)
+        self._waiters.append(future)
+        # wake the flusher to start the delay timer, or for a full batch
+        if len(self._items) == 1 or len(self._items) >= self.max_batch:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._closing or self._items:
+            if not self._items:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            due = self._batch_started + self.max_delay - time.monotonic()
+            if len(self._items) < self.max_batch and due > 0 and not (
+                self._closing
+            ):
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), due)
+                except TimeoutError:
+                    pass
+                continue
+            await self._flush_slots.acquire()
+            items = self._items[:self.max_batch]
+            waiters = self._waiters[:self.max_batch]
+            del self._items[:self.max_batch]
+            del self._waiters[:self.max_batch]
+            self._batch_started = time.monotonic()
+            task = asyncio.create_task(self._write(items, waiters))
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def _write(self, items, waiters):
+        try:
+            await self.flush(items)
+        except Exception as exc:
+            self.failed += len(items)
+            logger.exception("Flushing %d buffered items failed", len(items))
+            for waiter in waiters:
+                if waiter is not None and not waiter.done():
+                    waiter.set_exception(exc)
+        else:
+            self.flushed += len(items)
+            for waiter in waiters:
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(None)
+        finally:
+            self._flush_slots.release()
+            for _ in items:
+                self._room.release()
+
+    async def close(self):
+        """Flush everything still buffered, then stop."""
+        self._closing = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+        if self._flushes:
+            await asyncio.wait(self._flushes)
+
+
+@asynccontextmanager
+async def query_buffer():
+    """Write-behind buffer for store_queries_to_external_db.
+
+    Entered for the lifetime of a worker process, leaving it drains
+    whatever is still buffered.
+    """
+    buffer = WriteBehindBuffer(store_queries_to_external_db)
+    buffer.start()
+    try:
+        yield buffer
+    finally:
+        await buffer.close()
@@ -0,0 +1,147 @@
+"""Trip categories and coupons, loaded from a JSON file.
+
+Each load builds an immutable Catalog that request handlers read without
+locking. The file is checked for changes at most every
+CATALOG_RELOAD_INTERVAL seconds and reloaded in place, so every worker
+picks up edits without a restart. Coupon usage counts live outside the
+catalog and survive reloads. They are kept in this process only, so
+with N uvicorn workers a coupon can be redeemed up to N * max_uses times.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from types import MappingProxyType
+
+logger = logging.getLogger("uvicorn.error")
+
+CATALOG_PATH = os.getenv(
+    "CATALOG_PATH", str(Path(__file__).parent / "data" / "catalog.json")
+)
+CATALOG_RELOAD_INTERVAL = float(os.getenv("CATALOG_RELOAD_INTERVAL", "1"))
+
+
+@dataclass(frozen=True, slots=True)
+class Coupon:
+    code: str
+    category: str
+    expires: date | None = None
+    # counted per process and per code, see CatalogRegistry.redeem
+    max_uses: int | None = None
+
+    def expired(self, today: date) -> bool:
+        return self.expires is not None and today > self.expires
+
+
+@dataclass(frozen=True, slots=True)
+class Catalog:
+    categories: frozenset[str]
+    # (category, code) -> coupon
+    coupons: MappingProxyType
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Catalog":
+        categories = frozenset(data["categories"])
+        coupons = {}
+        for entry in data.get("coupons", ()):
+            coupon = Coupon(
+                code=entry["code"],
+                category=entry["category"],
+                expires=(
+                    date.fromisoformat(entry["expires"])
+                    if entry.get("expires") else None
+                ),
+                max_uses=entry.get("max_uses"),
+            )
+            if coupon.category not in categories:
+                raise ValueError(
+                    f"coupon {coupon.code} has unknown category"
+                    f" {coupon.category!r}"
+                )
+            coupons[coupon.category, coupon.code] = coupon
+        return cls(categories, MappingProxyType(coupons))
+
+
+class CatalogRegistry:
+    def __init__(self, path: str, reload_interval: float = 1):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._catalog: Catalog | None = None
+        self._mtime = 0
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._uses: dict[str, int] = {}
+
+    def load(self) -> Catalog:
+        with self._lock:
+            return self._load()
+
+    def _load(self) -> Catalog:
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path) as f:
+            catalog = Catalog.from_dict(json.load(f))
+        self._catalog, self._mtime = catalog, mtime
+        self._next_check = time.monotonic() + self.reload_interval
+        return catalog
+
+    def current(self) -> Catalog:
+        catalog = self._catalog
+        if catalog is not None and time.monotonic() < self._next_check:
+            return catalog
+        with self._lock:
+            if self._catalog is None:
+                return self._load()
+            if time.monotonic() >= self._next_check:
+                self._next_check = time.monotonic() + self.reload_interval
+                try:
+                    if os.stat(self.path).st_mtime_ns != self._mtime:
+                        self._load()
+                        logger.info("Reloaded catalog from %s", self.path)
+                except (OSError, ValueError, KeyError) as exc:
+                    # keep serving the last good catalog
+                    logger.error("Catalog reload failed: %s", exc)
+            return self._catalog
+
+    def available(self, coupon: Coupon) -> bool:
+        """Whether ``coupon`` has uses left, without counting one."""
+        if coupon.max_uses is None:
+            return True
+        return self.uses(coupon.code) < coupon.max_uses
+
+    def redeem(self, coupon: Coupon) -> bool:
+        """Count one use of ``coupon``, False once it is used up.
+
+        The count lives in this process, so the limit applies per worker
+        rather than across the deployment, and it is shared by every
+        category that has a coupon with the same code.
+        """
+        if coupon.max_uses is None:
+            return True
+        with self._lock:
+            uses = self._uses.get(coupon.code, 0)
+            if uses >= coupon.max_uses:
+                return False
+            self._uses[coupon.code] = uses + 1
+            return True
+
+    def uses(self, code: str) -> int:
+        return self._uses.get(code, 0)
+
+    def reset_uses(self):
+        with self._lock:
+            self._uses.clear()
+
+
+catalog_registry = CatalogRegistry(
+    CATALOG_PATH, reload_interval=CATALOG_RELOAD_INTERVAL
+)
+
+
+async def get_catalog() -> Catalog:
+    # async so FastAPI skips the threadpool; current() only stats the
+    # file once per reload interval
+    return catalog_registry.current()
@@ -1,54 +1,88 @@
+import time
 from typing import Tuple, Annotated
 from fastapi import HTTPException, Query, Depends, Path
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
+
+from app.catalog import Catalog, Coupon, catalog_registry, get_catalog
+
+# (today, timestamp of the next local midnight)
+_today: tuple[date, float] = (date.min, 0.0)
+
+def today() -> date:
+    """date.today(), recomputed only once the day has changed."""
+    global _today
+    day, next_midnight = _today
+    now = time.time()
+    if now < next_midnight:
+        return day
+    day = date.fromtimestamp(now)
+    next_midnight = datetime.combine(
+        day + timedelta(days=1), datetime.min.time()
+    ).timestamp()
+    _today = (day, next_midnight)
+    return day
 
 def check_end_start_condition(start_date: date = Query(None), end_date: date = Query(None)):
     if end_date and end_date < start_date:
         raise HTTPException(status_code=400, detail="end_date must be later than start_date")
 
-def time_range(
+async def time_range(
     start: date | None = Query(
-        default=date.today(),
+        default=None,
         description="If not provided, the current date will be used.",
-        examples=[date.today()]
+        examples=["2025-06-01"]
     ),
     end: date | None = Query(
         default=None,
-        examples=[date.today() + timedelta(days=7)]
+        examples=["2025-06-08"]
     )
     ) -> Tuple[date, date | None]:
+    # the default is resolved per request, not frozen at import
+    if start is None:
+        start = today()
     check_end_start_condition(start_date=start, end_date=end)
     return start, end
 
-def select_category(
+async def select_category(
     category: Annotated[
         str,
         Path(
-            description="Kind of travel you are interested in",
-            enum=[
-                "cruises",
-                "city-breaks",
-                "resort-stays",
-            ],
+            description=(
+                "Kind of travel you are interested in,"
+                " one of the catalog categories"
+            ),
+            examples=["cruises"],
         ),
     ],
+    catalog: Annotated[Catalog, Depends(get_catalog)],
     ) -> str:
+    if category not in catalog.categories:
+        raise HTTPException(
+            status_code=422, detail=f"Unknown category {category!r}"
+        )
     return category
 
-def check_coupon_validity(
+def find_coupon(
+    catalog: Catalog, category: str, code: str | None
+) -> Coupon | None:
+    """The coupon ``code`` of ``category``, None if unknown or expired."""
+    if code is None:
+        return None
+    coupon = catalog.coupons.get((category, code))
+    if coupon is None:
+        return None
+    # date.today() only for coupons that can expire
+    if coupon.expires is not None and coupon.expired(today()):
+        return None
+    return coupon
+
+async def check_coupon_validity(
     category: Annotated[select_category, Depends()],
+    catalog: Annotated[Catalog, Depends(get_catalog)],
     code: str | None = Query(
         None, description="Coupon code"
     ),
     ) -> bool:
-    coupon_dict = {
-        "cruises": "CRUISE10",
-        "city-breaks": "CITYBREAK15",
-        "resort-stays": "RESORT20",
-    }
-    if (
-        code is not None
-        and coupon_dict.get(category, ...) == code
-    ):
-        return True
-    return False
\ No newline at end of file
+    coupon = find_coupon(catalog, category, code)
+    # browsing only looks, a use is counted when the coupon is applied
+    return coupon is not None and catalog_registry.available(coupon)
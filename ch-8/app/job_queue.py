@@ -0,0 +1,299 @@
+"""Durable queue for work that must not run inside the web workers.
+
+Routes enqueue jobs and return, ``python -m app.worker`` processes run
+them. Both backends give at-least-once delivery: a claimed job is leased
+for ``visibility_timeout`` seconds and becomes claimable again if its
+worker dies before completing it. Every claim gets a fresh lease token,
+so a worker whose lease ran out cannot complete or retry a job that
+another worker has since claimed.
+
+The backend is picked from JOB_QUEUE_URL: a local SQLite file by
+default, or Redis for ``redis://`` URLs.
+"""
+import asyncio
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from fastapi import Request
+
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL", "sqlite:///jobs.db")
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+
+
+@dataclass(frozen=True, slots=True)
+class Job:
+    id: int
+    task: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+    lease: str
+
+
+class SQLiteJobQueue:
+    """Jobs in one SQLite table, shared by processes on the same host.
+
+    sqlite3 calls run in a worker thread so they never block the event
+    loop; a lock serializes them on the single connection.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id INTEGER PRIMARY KEY,
+        task TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'queued',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        max_attempts INTEGER NOT NULL,
+        available_at REAL NOT NULL,
+        locked_until REAL,
+        lease TEXT,
+        last_error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS ix_jobs_status_available
+        ON jobs (status, available_at);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False, timeout=15
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+
+    async def _run(self, sql: str, params=()) -> list[tuple]:
+        def run():
+            with self._lock:
+                return self._conn.execute(sql, params).fetchall()
+
+        return await asyncio.to_thread(run)
+
+    async def enqueue(
+        self,
+        task: str,
+        payload: dict,
+        delay: float = 0,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ) -> int:
+        rows = await self._run(
+            "INSERT INTO jobs (task, payload, max_attempts, available_at)"
+            " VALUES (?, ?, ?, ?) RETURNING id",
+            (task, json.dumps(payload), max_attempts, time.time() + delay),
+        )
+        return rows[0][0]
+
+    async def claim(self, limit: int, visibility_timeout: float) -> list[Job]:
+        now = time.time()
+        lease = secrets.token_hex(8)
+        # a single statement, so two workers can never claim the same job
+        rows = await self._run(
+            """
+            UPDATE jobs
+            SET status = 'running', attempts = attempts + 1,
+                locked_until = :locked_until, lease = :lease
+            WHERE id IN (
+                SELECT id FROM jobs
+                WHERE (status = 'queued' AND available_at <= :now)
+                   OR (status = 'running' AND locked_until <= :now)
+                ORDER BY available_at
+                LIMIT :limit
+            )
+            RETURNING id, task, payload, attempts, max_attempts
+            """,
+            {
+                "now": now,
+                "limit": limit,
+                "locked_until": now + visibility_timeout,
+                "lease": lease,
+            },
+        )
+        return [
+            Job(
+                job_id, task, json.loads(payload),
+                attempts, max_attempts, lease,
+            )
+            for job_id, task, payload, attempts, max_attempts in rows
+        ]
+
+    async def complete(self, job: Job) -> bool:
+        rows = await self._run(
+            "DELETE FROM jobs WHERE id = ? AND lease = ? RETURNING id",
+            (job.id, job.lease),
+        )
+        return bool(rows)
+
+    async def retry(self, job: Job, error: str, delay: float) -> bool:
+        rows = await self._run(
+            "UPDATE jobs SET status = 'queued', available_at = ?,"
+            " locked_until = NULL, lease = NULL, last_error = ?"
+            " WHERE id = ? AND lease = ? RETURNING id",
+            (time.time() + delay, error, job.id, job.lease),
+        )
+        return bool(rows)
+
+    async def fail(self, job: Job, error: str) -> bool:
+        # failed jobs stay in the table for inspection or manual requeue
+        rows = await self._run(
+            "UPDATE jobs SET status = 'failed', locked_until = NULL,"
+            " lease = NULL, last_error = ?"
+            " WHERE id = ? AND lease = ? RETURNING id",
+            (error, job.id, job.lease),
+        )
+        return bool(rows)
+
+    async def depth(self) -> dict[str, int]:
+        rows = await self._run(
+            "SELECT status, count(*) FROM jobs GROUP BY status"
+        )
+        return {"queued": 0, "running": 0, "failed": 0, **dict(rows)}
+
+    async def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisJobQueue:
+    """Jobs in Redis: a hash per job plus sorted sets by due time.
+
+    ``ready`` is scored by when a job may run, ``running`` by when its
+    lease runs out. Each state change is one Lua call.
+    """
+
+    CLAIM = """
+    local now, limit, visibility, lease = tonumber(ARGV[1]),
+        tonumber(ARGV[2]), tonumber(ARGV[3]), ARGV[4]
+    for _, id in ipairs(redis.call("ZRANGEBYSCORE", KEYS[2], "-inf", now)) do
+        redis.call("ZREM", KEYS[2], id)
+        redis.call("ZADD", KEYS[1], now, id)
+    end
+    local claimed = {}
+    local ids = redis.call(
+        "ZRANGEBYSCORE", KEYS[1], "-inf", now, "LIMIT", 0, limit)
+    for _, id in ipairs(ids) do
+        local key = ARGV[5] .. id
+        redis.call("ZREM", KEYS[1], id)
+        redis.call("ZADD", KEYS[2], now + visibility, id)
+        local attempts = redis.call("HINCRBY", key, "attempts", 1)
+        redis.call("HSET", key, "lease", lease)
+        local job = redis.call("HMGET", key, "task", "payload", "max_attempts")
+        table.insert(claimed, {id, job[1], job[2], attempts, job[3]})
+    end
+    return claimed
+    """
+    # KEYS: running, job hash, then ready or failed; ARGV: id, lease, ...
+    SETTLE = """
+    if redis.call("HGET", KEYS[2], "lease") ~= ARGV[2] then
+        return 0
+    end
+    redis.call("ZREM", KEYS[1], ARGV[1])
+    if ARGV[3] == "complete" then
+        redis.call("DEL", KEYS[2])
+    elseif ARGV[3] == "retry" then
+        redis.call("HDEL", KEYS[2], "lease")
+        redis.call("HSET", KEYS[2], "last_error", ARGV[4])
+        redis.call("ZADD", KEYS[3], ARGV[5], ARGV[1])
+    else
+        redis.call("HDEL", KEYS[2], "lease")
+        redis.call("HSET", KEYS[2], "last_error", ARGV[4])
+        redis.call("SADD", KEYS[3], ARGV[1])
+    end
+    return 1
+    """
+
+    def __init__(self, client, prefix: str = "jobs"):
+        self.client = client
+        self.prefix = prefix
+        self._claim = client.register_script(self.CLAIM)
+        self._settle = client.register_script(self.SETTLE)
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}:{name}"
+
+    async def enqueue(
+        self,
+        task: str,
+        payload: dict,
+        delay: float = 0,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ) -> int:
+        job_id = await self.client.incr(self._key("next_id"))
+        pipe = self.client.pipeline()
+        pipe.hset(self._key(f"job:{job_id}"), mapping={
+            "task": task,
+            "payload": json.dumps(payload),
+            "attempts": 0,
+            "max_attempts": max_attempts,
+        })
+        pipe.zadd(self._key("ready"), {job_id: time.time() + delay})
+        await pipe.execute()
+        return job_id
+
+    async def claim(self, limit: int, visibility_timeout: float) -> list[Job]:
+        lease = secrets.token_hex(8)
+        rows = await self._claim(
+            keys=[self._key("ready"), self._key("running")],
+            args=[
+                time.time(), limit, visibility_timeout, lease,
+                self._key("job:"),
+            ],
+        )
+        return [
+            Job(
+                int(job_id), task.decode(), json.loads(payload),
+                int(attempts), int(max_attempts), lease,
+            )
+            for job_id, task, payload, attempts, max_attempts in rows
+        ]
+
+    async def _settle_job(self, job: Job, action: str, *args, target=""):
+        keys = [self._key("running"), self._key(f"job:{job.id}")]
+        if target:
+            keys.append(self._key(target))
+        return bool(await self._settle(
+            keys=keys, args=[job.id, job.lease, action, *args]
+        ))
+
+    async def complete(self, job: Job) -> bool:
+        return await self._settle_job(job, "complete")
+
+    async def retry(self, job: Job, error: str, delay: float) -> bool:
+        return await self._settle_job(
+            job, "retry", error, time.time() + delay, target="ready"
+        )
+
+    async def fail(self, job: Job, error: str) -> bool:
+        return await self._settle_job(job, "fail", error, target="failed")
+
+    async def depth(self) -> dict[str, int]:
+        pipe = self.client.pipeline()
+        pipe.zcard(self._key("ready"))
+        pipe.zcard(self._key("running"))
+        pipe.scard(self._key("failed"))
+        queued, running, failed = await pipe.execute()
+        return {"queued": queued, "running": running, "failed": failed}
+
+    async def close(self):
+        await self.client.aclose()
+
+
+JobQueue = SQLiteJobQueue | RedisJobQueue
+
+
+def create_job_queue(url: str = JOB_QUEUE_URL):
+    if url.startswith(("redis://", "rediss://")):
+        from redis import asyncio as aioredis
+
+        return RedisJobQueue(aioredis.from_url(url))
+    return SQLiteJobQueue(url.removeprefix("sqlite:///"))
+
+
+async def get_job_queue(request: Request) -> JobQueue:
+    return request.app.state.job_queue
@@ -1,20 +1,63 @@
 import logging
+import os
+from contextlib import asynccontextmanager
+from datetime import date
 from typing import Annotated
-from app.dependencies import time_range, select_category, check_coupon_validity
-from fastapi import Depends, FastAPI, BackgroundTasks
+from app.dependencies import (
+    check_coupon_validity,
+    find_coupon,
+    select_category,
+    time_range,
+)
+from fastapi import Depends, FastAPI, HTTPException, Query
+from pydantic import BaseModel
 
-from app.background_task import store_query_to_external_db
+from app.catalog import Catalog, catalog_registry, get_catalog
+from app.job_queue import JobQueue, create_job_queue, get_job_queue
+from app.response_cache import ResponseCache
+from app.trips import TripCatalog, get_trip_catalog, load_trip_catalog
+from app.metrics import JOB_QUEUE_DEPTH, JOBS_ENQUEUED
+from app.prometheus import MetricsMiddleware, metrics_endpoint, registry
 
 logger = logging.getLogger("uvicorn.error")
 
-app = FastAPI()
+TRIPS_CACHE_TTL = float(os.getenv("TRIPS_CACHE_TTL", "60"))
+TRIPS_CACHE_SIZE = int(os.getenv("TRIPS_CACHE_SIZE", "1024"))
+
+trips_cache = ResponseCache(
+    "trips_by_category", ttl=TRIPS_CACHE_TTL, maxsize=TRIPS_CACHE_SIZE
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # fail at startup rather than on the first request
+    catalog_registry.load()
+    load_trip_catalog()
+    # jobs are run by ``python -m app.worker``, not by this process
+    job_queue = create_job_queue()
+    app.state.job_queue = job_queue
+
+    async def collect_queue_depth():
+        for status, count in (await job_queue.depth()).items():
+            JOB_QUEUE_DEPTH.set(status, value=count)
+
+    registry.collectors.append(collect_queue_depth)
+    yield
+    registry.collectors.remove(collect_queue_depth)
+    await job_queue.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Hello World"}
 
 @app.get("/v1/trips")
-def get_trips(
+async def get_trips(
     time_range: Annotated[time_range, Depends()]
     ):
     start, end = time_range
@@ -23,9 +66,28 @@ def get_trips(
         return f"{message} {end}"
     return message
 
+async def enqueue_trip_query(job_queue: JobQueue, message: str):
+    await job_queue.enqueue(
+        "store_query_to_external_db", {"message": message}
+    )
+    JOBS_ENQUEUED.inc("store_query_to_external_db")
+    logger.info(
+        "Query sent to the job queue, end of request."
+    )
+
+async def enqueue_cached_trip_query(params: dict, message: str):
+    await enqueue_trip_query(params["job_queue"], message)
+
 @app.get("/v2/trips/{category}")
-def get_trips_by_category(
-    background_tasks: BackgroundTasks,
+# every request is still logged and a coupon can run out meanwhile, so
+# clients revalidate with the ETag instead of reusing the response unasked
+@trips_cache.cached(
+    key=("category", "discount_applicable"),
+    on_hit=enqueue_cached_trip_query,
+    cache_control="no-cache",
+)
+async def get_trips_by_category(
+    job_queue: Annotated[JobQueue, Depends(get_job_queue)],
     category: Annotated[select_category, Depends()],
     discount_applicable: Annotated[
         bool, Depends(check_coupon_validity)
@@ -40,10 +102,43 @@ def get_trips_by_category(
             "You will get a discount!"
         )
 
-    background_tasks.add_task(
-        store_query_to_external_db, message
-    )
-    logger.info(
-        "Query sent to background task, end of request."
-    )
-    return message
\ No newline at end of file
+    await enqueue_trip_query(job_queue, message)
+    return message
+
+@app.post("/v2/trips/{category}/coupon")
+async def apply_coupon(
+    category: Annotated[select_category, Depends()],
+    catalog: Annotated[Catalog, Depends(get_catalog)],
+    code: str = Query(description="Coupon code"),
+):
+    # the only place a coupon use is counted
+    coupon = find_coupon(catalog, category, code)
+    if coupon is None or not catalog_registry.redeem(coupon):
+        raise HTTPException(
+            status_code=409, detail="Coupon is invalid, expired or used up"
+        )
+    return {"message": "The coupon code is valid! You will get a discount!"}
+
+class TripSchema(BaseModel):
+    id: int
+    category: str
+    destination: str
+    start: date
+    end: date
+    price: int
+
+class TripPageSchema(BaseModel):
+    trips: list[TripSchema]
+    total: int
+    next_offset: int | None
+
+@app.get("/v2/trips/{category}/search", response_model=TripPageSchema)
+async def search_trips(
+    category: Annotated[select_category, Depends()],
+    time_range: Annotated[time_range, Depends()],
+    catalog: Annotated[TripCatalog, Depends(get_trip_catalog)],
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+):
+    start, end = time_range
+    return catalog.search(start, end, category, offset, limit)
@@ -0,0 +1,28 @@
+"""Job queue and response cache metrics of this app.
+
+The collectors, the registry, the request middleware and the /metrics
+endpoint are in app.prometheus, vendored unchanged from ch-5; this
+module only adds what ch-8 measures on top of them.
+"""
+from app.prometheus import Counter, Gauge, registry
+
+JOBS_ENQUEUED = registry.register(Counter(
+    "jobs_enqueued_total",
+    "Jobs put on the job queue by this process.",
+    ("task",),
+))
+JOB_QUEUE_DEPTH = registry.register(Gauge(
+    "job_queue_depth",
+    "Jobs on the job queue by status, read at scrape time.",
+    ("status",),
+))
+RESPONSE_CACHE_REQUESTS = registry.register(Counter(
+    "response_cache_requests_total",
+    "Cached route lookups by cache and result, hit or miss.",
+    ("cache", "result"),
+))
+RESPONSE_CACHE_ENTRIES = registry.register(Gauge(
+    "response_cache_entries",
+    "Responses currently held by each route cache.",
+    ("cache",),
+))
@@ -0,0 +1,219 @@
+"""Metrics in the Prometheus text format, with request instrumentation.
+
+Metrics are plain dicts of numbers updated in place, rendered on demand
+by the ``/metrics`` route, so no client library or extra server is
+needed. Updates are not locked: the middleware runs on the event loop
+thread, and a rare lost increment from another thread, a threadpool
+worker or a database driver's, is acceptable.
+
+This file is vendored unchanged as ch-5/protoapp/prometheus.py,
+ch-6/app/prometheus.py, ch-7/streaming/app/prometheus.py and
+ch-8/app/prometheus.py, so each chapter runs on its own. Change all
+four copies together; ch-5's tests/test_metrics.py fails while they
+differ. A chapter's own metrics go in its metrics module.
+"""
+import time
+from bisect import bisect_left
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# seconds, upper bounds of each bucket; +Inf is implied
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _escape(value) -> str:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels) -> float:
+        return self.values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {value}"
+            for labels, value in self.values.items()
+        ]
+
+    def clear(self):
+        self.values.clear()
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float):
+        self.values[labels] = value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets=DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # per label set: one count per bucket, +Inf, then sum
+        self.series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels) -> int:
+        series = self.series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> list[str]:
+        lines = []
+        bounds = [*map(str, self.buckets), "+Inf"]
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, series):
+                cumulative += bucket_count
+                le = 'le="' + bound + '"'
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_str = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {series[-1]}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+    def clear(self):
+        self.series.clear()
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Counter | Histogram] = []
+        # async callables that refresh gauges right before a scrape
+        self.collectors: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    async def collect(self):
+        for collector in self.collectors:
+            await collector()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    "http_requests_total",
+    "HTTP requests handled.",
+    ("method", "route", "status"),
+))
+IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled.",
+))
+REQUEST_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency.",
+    ("method", "route"),
+))
+
+
+def route_template(scope) -> str:
+    # newer Starlette records the matched route in the scope
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            IN_FLIGHT.dec()
+            method, route = scope["method"], route_template(scope)
+            REQUESTS.inc(method, route, str(status_code))
+            REQUEST_LATENCY.observe(duration, method, route)
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    await registry.collect()
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,134 @@
+"""Caches encoded route responses by their resolved parameters.
+
+Dependencies still run on every request, only the route body and the
+JSON encoding are skipped on a hit, so a cache key can safely include
+values such as ``discount_applicable`` that a dependency computes per
+request. Routes with side effects pass ``on_hit`` to keep them running
+when the cached response is served.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.metrics import RESPONSE_CACHE_ENTRIES, RESPONSE_CACHE_REQUESTS
+
+_REQUEST_PARAM = "_response_cache_request"
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    value: Any
+    body: bytes
+    etag: str
+
+
+def encode(value) -> CachedResponse:
+    # the same encoding FastAPI's JSONResponse uses
+    body = json.dumps(
+        jsonable_encoder(value),
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode()
+    etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+    return CachedResponse(value, body, etag)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return any(tag in (etag, "*") for tag in tags)
+
+
+class ResponseCache:
+    """LRU of encoded responses, entries expire after ``ttl`` seconds."""
+
+    def __init__(self, name: str, ttl: float = 60, maxsize: int = 1024):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple, tuple[float, CachedResponse]] = (
+            OrderedDict()
+        )
+
+    def get(self, key: tuple) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, response = entry
+            if expires_at >= time.monotonic():
+                self._entries.move_to_end(key)
+                RESPONSE_CACHE_REQUESTS.inc(self.name, "hit")
+                return response
+            del self._entries[key]
+        RESPONSE_CACHE_REQUESTS.inc(self.name, "miss")
+        return None
+
+    def set(self, key: tuple, response: CachedResponse):
+        self._entries[key] = (time.monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        RESPONSE_CACHE_ENTRIES.set(self.name, value=len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        RESPONSE_CACHE_ENTRIES.set(self.name, value=0)
+
+    def cached(self, key: tuple[str, ...], on_hit=None, cache_control=None):
+        """Decorate a route, caching its response per ``key`` params.
+
+        ``key`` names the route parameters, path, query or resolved
+        dependencies, the response depends on. ``on_hit(params, value)``
+        is awaited when a cached response is served.
+        """
+        if cache_control is None:
+            cache_control = f"max-age={int(self.ttl)}"
+
+        def decorator(func):
+            signature = inspect.signature(func)
+
+            @functools.wraps(func)
+            async def wrapper(**params):
+                request: Request = params.pop(_REQUEST_PARAM)
+                cache_key = tuple(params[name] for name in key)
+                cached = self.get(cache_key)
+                if cached is None:
+                    value = await func(**params)
+                    if isinstance(value, Response):
+                        return value
+                    cached = encode(value)
+                    self.set(cache_key, cached)
+                elif on_hit is not None:
+                    await on_hit(params, cached.value)
+                headers = {"ETag": cached.etag, "Cache-Control": cache_control}
+                if etag_matches(request.headers.get("if-none-match"), cached.etag):
+                    return Response(status_code=304, headers=headers)
+                return Response(
+                    cached.body, media_type="application/json", headers=headers
+                )
+
+            # FastAPI reads the signature to resolve parameters, add the
+            # request so conditional GETs can be answered here
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(
+                    _REQUEST_PARAM,
+                    inspect.Parameter.KEYWORD_ONLY,
+                    annotation=Request,
+                ),
+            ])
+            return wrapper
+
+        return decorator
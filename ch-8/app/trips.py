@@ -0,0 +1,125 @@
+"""In-memory trip catalog searchable by category and start date.
+
+Trips are loaded once from a JSON or CSV fixture and kept in sorted
+arrays, one for all trips and one per category, ordered by start date.
+A date range query is two bisects plus a slice, O(log n + k), and
+pagination is index arithmetic on the same slice.
+"""
+import csv
+import json
+import os
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+
+TRIPS_PATH = os.getenv(
+    "TRIPS_PATH", str(Path(__file__).parent / "data" / "trips.json")
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Trip:
+    id: int
+    category: str
+    destination: str
+    start: date
+    end: date
+    price: int
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Trip":
+        return cls(
+            id=int(data["id"]),
+            category=data["category"],
+            destination=data["destination"],
+            start=date.fromisoformat(data["start"]),
+            end=date.fromisoformat(data["end"]),
+            price=int(data["price"]),
+        )
+
+
+class DateIndex:
+    """Trips sorted by (start, id) with their start ordinals alongside."""
+
+    def __init__(self, trips):
+        self.trips = sorted(trips, key=lambda trip: (trip.start, trip.id))
+        # bisecting plain ints is cheaper than comparing date objects
+        self.starts = [trip.start.toordinal() for trip in self.trips]
+
+    def span(self, start: date | None, end: date | None) -> tuple[int, int]:
+        """Positions of the trips starting within [start, end]."""
+        lo = bisect_left(self.starts, start.toordinal()) if start else 0
+        hi = (
+            bisect_right(self.starts, end.toordinal(), lo)
+            if end else len(self.starts)
+        )
+        return lo, max(lo, hi)
+
+    def __len__(self) -> int:
+        return len(self.trips)
+
+
+@dataclass(frozen=True, slots=True)
+class TripPage:
+    trips: list[Trip]
+    total: int
+    next_offset: int | None
+
+
+class TripCatalog:
+    def __init__(self, trips):
+        trips = list(trips)
+        self.all = DateIndex(trips)
+        by_category: dict[str, list[Trip]] = {}
+        for trip in trips:
+            by_category.setdefault(trip.category, []).append(trip)
+        self.by_category = {
+            category: DateIndex(category_trips)
+            for category, category_trips in by_category.items()
+        }
+
+    @classmethod
+    def from_file(cls, path: str) -> "TripCatalog":
+        with open(path, newline="") as f:
+            if path.endswith(".csv"):
+                rows = list(csv.DictReader(f))
+            else:
+                rows = json.load(f)
+        return cls(Trip.from_dict(row) for row in rows)
+
+    def search(
+        self,
+        start: date | None = None,
+        end: date | None = None,
+        category: str | None = None,
+        offset: int = 0,
+        limit: int = 50,
+    ) -> TripPage:
+        if category is None:
+            index = self.all
+        elif category in self.by_category:
+            index = self.by_category[category]
+        else:
+            return TripPage([], 0, None)
+        lo, hi = index.span(start, end)
+        first = lo + offset
+        last = min(hi, first + limit)
+        return TripPage(
+            trips=index.trips[first:last],
+            total=hi - lo,
+            next_offset=offset + limit if last < hi else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.all)
+
+
+@lru_cache(maxsize=1)
+def load_trip_catalog() -> TripCatalog:
+    return TripCatalog.from_file(TRIPS_PATH)
+
+
+async def get_trip_catalog() -> TripCatalog:
+    return load_trip_catalog()
@@ -0,0 +1,194 @@
+"""Runs queued jobs outside the web workers.
+
+Run from ch-8 with: python -m app.worker [--processes N] [--concurrency M]
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import random
+import signal
+
+from app.background_task import query_buffer, store_query_to_external_db
+from app.job_queue import Job, create_job_queue
+
+logger = logging.getLogger("app.worker")
+
+# task name in the queue -> coroutine function taking the payload
+TASKS = {
+    "store_query_to_external_db": store_query_to_external_db,
+}
+
+
+class Worker:
+    """Claims jobs and runs up to ``concurrency`` of them at a time.
+
+    Failed jobs are retried with exponential backoff and jitter until
+    they run out of attempts, then marked failed. A job is cancelled if
+    it outlives its visibility timeout, since by then another worker may
+    already have claimed it again.
+    """
+
+    def __init__(
+        self,
+        queue,
+        tasks=TASKS,
+        concurrency: int = 10,
+        visibility_timeout: float = 30,
+        poll_interval: float = 0.5,
+        backoff_base: float = 1,
+        backoff_max: float = 60,
+    ):
+        self.queue = queue
+        self.tasks = tasks
+        self.concurrency = concurrency
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._running: set[asyncio.Task] = set()
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1))
+        # equal jitter keeps retries of a burst from landing together
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def execute(self, job: Job):
+        func = self.tasks.get(job.task)
+        if func is None:
+            await self.queue.fail(job, f"unknown task {job.task!r}")
+            return
+        if job.attempts > job.max_attempts:
+            # reclaimed after its lease ran out on the last attempt
+            await self.queue.fail(job, "visibility timeout on last attempt")
+            return
+        try:
+            await asyncio.wait_for(
+                func(**job.payload), timeout=self.visibility_timeout
+            )
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            if job.attempts >= job.max_attempts:
+                logger.error("Job %s (%s) failed: %s", job.id, job.task, error)
+                await self.queue.fail(job, error)
+            else:
+                await self.queue.retry(job, error, self.backoff(job.attempts))
+        else:
+            await self.queue.complete(job)
+
+    async def poll(self) -> int:
+        """Start as many jobs as there are free slots, return how many."""
+        free = self.concurrency - len(self._running)
+        if free <= 0:
+            return 0
+        jobs = await self.queue.claim(free, self.visibility_timeout)
+        for job in jobs:
+            task = asyncio.create_task(self.execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        return len(jobs)
+
+    async def run(self, stop: asyncio.Event):
+        while not stop.is_set():
+            if await self.poll():
+                continue
+            # nothing claimable or no free slot, wait for either to change
+            waiters = [asyncio.ensure_future(stop.wait()), *self._running]
+            await asyncio.wait(
+                waiters,
+                timeout=self.poll_interval,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            waiters[0].cancel()
+        # let claimed jobs finish, unfinished ones would be redelivered
+        if self._running:
+            await asyncio.wait(self._running)
+
+    async def run_until_empty(self):
+        """Process jobs until none are claimable, used by tests."""
+        while await self.poll() or self._running:
+            if self._running:
+                await asyncio.wait(
+                    self._running, return_when=asyncio.FIRST_COMPLETED
+                )
+
+
+async def serve(concurrency: int, visibility_timeout: float):
+    queue = create_job_queue()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        # the buffer outlives the worker so running jobs can still flush
+        async with query_buffer() as buffer:
+
+            async def store_query(message: str):
+                # the job completes only once its batch is written
+                await buffer.submit(message)
+
+            worker = Worker(
+                queue,
+                tasks={**TASKS, "store_query_to_external_db": store_query},
+                concurrency=concurrency,
+                visibility_timeout=visibility_timeout,
+            )
+            logger.info("Worker started, concurrency %d", concurrency)
+            await worker.run(stop)
+    finally:
+        await queue.close()
+    logger.info("Worker stopped")
+
+
+def run_process(concurrency: int, visibility_timeout: float):
+    logging.basicConfig(
+        level=logging.INFO, format="%(processName)s %(message)s"
+    )
+    asyncio.run(serve(concurrency, visibility_timeout))
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1000,
+        help="Jobs run at once by each process, most of them only wait "
+        "for their batch to be written",
+    )
+    parser.add_argument(
+        "--visibility-timeout",
+        type=float,
+        default=30,
+        help="Seconds before an unfinished job is handed to another worker",
+    )
+    args = parser.parse_args(argv)
+    if args.processes == 1:
+        run_process(args.concurrency, args.visibility_timeout)
+        return
+    processes = [
+        multiprocessing.Process(
+            target=run_process,
+            args=(args.concurrency, args.visibility_timeout),
+            name=f"worker-{i}",
+        )
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    def stop_processes(signum, frame):
+        for process in processes:
+            process.terminate()
+
+    # Ctrl+C already reaches every process in the group, a SIGTERM sent
+    # to this one is forwarded; each child drains its jobs and exits
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, stop_processes)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Per-request cost of the category and coupon dependencies.
+
+Calls the dependency functions directly, as FastAPI would once per
+request, for the previous implementation (coupon dict rebuilt on every
+call) and for the catalog registry, with valid, wrong and missing codes.
+
+Run from ch-8 with: python -m benchmarks.bench_coupons
+"""
+import time
+
+from app.catalog import catalog_registry
+from app.dependencies import check_coupon_validity, select_category
+
+N = 200_000
+REPEAT = 5
+CASES = (("cruises", "CRUISE10"), ("city-breaks", "WRONG"), ("cruises", None))
+
+
+def previous_select_category(category: str) -> str:
+    return category
+
+
+def previous_check_coupon_validity(category: str, code: str | None) -> bool:
+    coupon_dict = {
+        "cruises": "CRUISE10",
+        "city-breaks": "CITYBREAK15",
+        "resort-stays": "RESORT20",
+    }
+    if (
+        code is not None
+        and coupon_dict.get(category, ...) == code
+    ):
+        return True
+    return False
+
+
+def previous(category, code):
+    category = previous_select_category(category)
+    return previous_check_coupon_validity(category, code)
+
+
+def run(coro):
+    # the dependencies never suspend, drive them without an event loop
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("dependency suspended")
+
+
+def registry(category, code):
+    catalog = catalog_registry.current()
+    category = run(select_category(category, catalog))
+    return run(check_coupon_validity(category, catalog, code))
+
+
+def best_of(func, category, code) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        for _ in range(N):
+            func(category, code)
+        best = min(best, time.perf_counter() - start)
+    return best / N * 1e9
+
+
+def main():
+    catalog_registry.load()
+    for category, code in CASES:
+        label = f"{category}/{code}"
+        old = best_of(previous, category, code)
+        new = best_of(registry, category, code)
+        print(
+            f"{label:<22} previous {old:7.0f} ns"
+            f"  registry {new:7.0f} ns ({new / old:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Per-request cost of the select_category -> check_coupon_validity chain.
+
+Sends GET /v2/trips/cruises?code=CRUISE10 through httpx's ASGITransport,
+so no sockets are involved, against:
+
+- sync: the route and dependencies as plain ``def``, which FastAPI runs
+  in the threadpool, as they were before the async conversion;
+- async: the app as it is now, including its metrics middleware.
+
+Both are timed with the measure() harness of bench_routes, which
+reports latency percentiles for sequential requests and throughput with
+CONCURRENCY requests in flight. The job queue is replaced by its no-op
+NullQueue on app.state, not through dependency_overrides: while any
+override is set FastAPI re-analyzes every dependency on every request,
+which would swamp the comparison.
+
+Run from ch-8 with: python -m benchmarks.bench_dependency_chain
+"""
+import asyncio
+import logging
+from typing import Annotated
+
+from fastapi import Depends, FastAPI, HTTPException, Query
+from httpx import ASGITransport, AsyncClient
+
+from app.catalog import Catalog, catalog_registry
+from app.main import app
+from benchmarks.bench_routes import CONCURRENCY, NullQueue, measure
+
+N = 5_000
+URL = "/v2/trips/cruises?code=CRUISE10"
+
+logging.getLogger("uvicorn.error").setLevel(logging.WARNING)
+
+
+def sync_app() -> FastAPI:
+    sync = FastAPI()
+
+    def get_catalog() -> Catalog:
+        return catalog_registry.current()
+
+    def select_category(
+        category: str, catalog: Annotated[Catalog, Depends(get_catalog)]
+    ) -> str:
+        if category not in catalog.categories:
+            raise HTTPException(status_code=422)
+        return category
+
+    def check_coupon_validity(
+        category: Annotated[str, Depends(select_category)],
+        catalog: Annotated[Catalog, Depends(get_catalog)],
+        code: str | None = Query(None),
+    ) -> bool:
+        coupon = catalog.coupons.get((category, code))
+        return coupon is not None and catalog_registry.available(coupon)
+
+    def get_queue():
+        return NullQueue()
+
+    @sync.get("/v2/trips/{category}")
+    def get_trips_by_category(
+        queue: Annotated[NullQueue, Depends(get_queue)],
+        category: Annotated[str, Depends(select_category)],
+        discount_applicable: Annotated[
+            bool, Depends(check_coupon_validity)
+        ],
+    ):
+        return f"You requested {category} trips."
+
+    return sync
+
+
+async def run(target: FastAPI) -> dict:
+    async with AsyncClient(
+        transport=ASGITransport(app=target), base_url="http://bench"
+    ) as client:
+        return await measure(client, URL, N)
+
+
+def report(label: str, result: dict):
+    latency = result["latency_us"]
+    print(
+        f"{label:<6} p50 {latency['p50']:6.0f} us"
+        f"  p99 {latency['p99']:6.0f} us"
+        f"  {result['req_per_s']:7.0f} req/s at {CONCURRENCY} in flight"
+    )
+
+
+async def main():
+    catalog_registry.load()
+    app.state.job_queue = NullQueue()
+    for label, target in (("sync", sync_app()), ("async", app)):
+        report(label, await run(target))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,187 @@
+"""Per-route cost of the app and its dependency trees, for regressions.
+
+Sends each ROUTES request through httpx's ASGITransport, so no sockets
+are involved, in two modes:
+
+- plain: the app as it is served, with a no-op job queue on app.state;
+- overrides: the same no-op queue set through app.dependency_overrides,
+  as the tests do. While any override is set FastAPI re-analyzes every
+  dependency on every request, so this shows what that costs per route.
+
+For every route and mode it records latency percentiles of sequential
+requests and throughput with CONCURRENCY requests in flight, prints a
+table and writes the results to a JSON file. Given a previous results
+file with --compare it prints the change per route and exits non-zero
+when any throughput dropped by more than --threshold.
+
+NullQueue and measure() are also the harness of the other request
+benchmarks, such as bench_dependency_chain.
+
+Run from ch-8 with:
+    python -m benchmarks.bench_routes [--output FILE] [--compare FILE]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+from httpx import ASGITransport, AsyncClient
+
+from app.catalog import catalog_registry
+from app.job_queue import get_job_queue
+from app.main import app
+
+N = 2_000
+WARMUP = 200
+CONCURRENCY = 50
+ROUTES = {
+    "root": "/",
+    "v1 trips": "/v1/trips",
+    "v1 trips range": "/v1/trips?start=2030-01-01&end=2030-01-08",
+    "v2 trips": "/v2/trips/cruises",
+    "v2 trips coupon": "/v2/trips/cruises?code=CRUISE10",
+    "v2 search": "/v2/trips/cruises/search?start=2025-01-01&end=2025-12-31",
+}
+MODES = ("plain", "overrides")
+
+logging.getLogger("uvicorn.error").setLevel(logging.WARNING)
+
+
+class NullQueue:
+    async def enqueue(self, task, payload, **kwargs):
+        return 0
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def measure(client: AsyncClient, url: str, n: int) -> dict:
+    for _ in range(WARMUP):
+        (await client.get(url)).raise_for_status()
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await client.get(url)
+        latencies.append(time.perf_counter() - start)
+
+    async def fire(count):
+        for _ in range(count):
+            await client.get(url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(fire(n // CONCURRENCY) for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "req_per_s": round(n // CONCURRENCY * CONCURRENCY / elapsed, 1),
+        "latency_us": {
+            "p50": round(quantiles[49] * 1e6, 1),
+            "p90": round(quantiles[89] * 1e6, 1),
+            "p99": round(quantiles[98] * 1e6, 1),
+            "mean": round(statistics.fmean(latencies) * 1e6, 1),
+            "max": round(max(latencies) * 1e6, 1),
+        },
+    }
+
+
+async def run(n: int) -> list[dict]:
+    catalog_registry.load()
+    queue = NullQueue()
+    app.state.job_queue = queue
+    results = []
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        for mode in MODES:
+            if mode == "overrides":
+                app.dependency_overrides[get_job_queue] = lambda: queue
+            try:
+                for route, url in ROUTES.items():
+                    result = await measure(client, url, n)
+                    results.append({"route": route, "mode": mode, **result})
+                    print(format_result(results[-1]), flush=True)
+            finally:
+                app.dependency_overrides.clear()
+    return results
+
+
+def format_result(result: dict) -> str:
+    latency = result["latency_us"]
+    return (
+        f"{result['route']:<16} {result['mode']:<9}"
+        f" {result['req_per_s']:8.0f} req/s"
+        f"  p50 {latency['p50']:6.0f} us  p99 {latency['p99']:6.0f} us"
+    )
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> bool:
+    """Print throughput changes against ``baseline``, True if none regressed."""
+    before = {
+        (result["route"], result["mode"]): result["req_per_s"]
+        for result in baseline["results"]
+    }
+    print(f"\ncompared with {baseline['commit']} ({baseline['timestamp']})")
+    ok = True
+    for result in results:
+        old = before.get((result["route"], result["mode"]))
+        if not old:
+            continue
+        change = result["req_per_s"] / old - 1
+        regressed = change < -threshold
+        ok = ok and not regressed
+        print(
+            f"{result['route']:<16} {result['mode']:<9}"
+            f" {old:8.0f} -> {result['req_per_s']:8.0f} req/s"
+            f" {change:+7.1%}{'  REGRESSED' if regressed else ''}"
+        )
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=N)
+    parser.add_argument("--output", default="bench_routes.json")
+    parser.add_argument("--compare", help="results file of an earlier run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="allowed throughput drop against --compare, 0.1 is 10%%",
+    )
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args.requests))
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "requests": args.requests,
+        "concurrency": CONCURRENCY,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""Date range lookups over a 1M trip catalog.
+
+Builds a TripCatalog of N_TRIPS synthetic trips spread over four years
+and times TripCatalog.search for random windows of one day, one week and
+one month, per category, fetching the first page of 50. A linear scan
+over the same trips is timed for comparison.
+
+Run from ch-8 with: python -m benchmarks.bench_trips [n_trips]
+"""
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from app.trips import Trip, TripCatalog
+
+N_TRIPS = 1_000_000
+QUERIES = 2_000
+CATEGORIES = ("cruises", "city-breaks", "resort-stays")
+FIRST_DAY = date(2025, 1, 1)
+DAYS = 4 * 365
+
+
+def synthetic_trips(n_trips: int):
+    rng = random.Random(0)
+    days = [FIRST_DAY + timedelta(days=d) for d in range(DAYS)]
+    for trip_id in range(n_trips):
+        start = rng.choice(days)
+        yield Trip(
+            trip_id, rng.choice(CATEGORIES), "Lisbon",
+            start, start + timedelta(days=7), rng.randrange(300, 4000),
+        )
+
+
+def windows(length: int):
+    rng = random.Random(length)
+    for _ in range(QUERIES):
+        start = FIRST_DAY + timedelta(days=rng.randrange(DAYS - length))
+        yield start, start + timedelta(days=length - 1), rng.choice(CATEGORIES)
+
+
+def main():
+    n_trips = int(sys.argv[1]) if len(sys.argv) > 1 else N_TRIPS
+    trips = list(synthetic_trips(n_trips))
+    start = time.perf_counter()
+    catalog = TripCatalog(trips)
+    print(
+        f"indexed {len(catalog)} trips"
+        f" in {time.perf_counter() - start:.2f}s"
+    )
+
+    for label, length in (("1 day", 1), ("1 week", 7), ("1 month", 30)):
+        queries = list(windows(length))
+        matches = 0
+        begin = time.perf_counter()
+        for first, last, category in queries:
+            matches += catalog.search(first, last, category, limit=50).total
+        elapsed = (time.perf_counter() - begin) / len(queries)
+        print(
+            f"{label:<8} {elapsed * 1e6:8.1f} us/query"
+            f"  ({matches // len(queries)} matching trips on average)"
+        )
+
+    first, last, category = next(windows(7))
+    begin = time.perf_counter()
+    found = [
+        trip for trip in trips
+        if trip.category == category and first <= trip.start <= last
+    ]
+    print(
+        f"linear scan, 1 week: {(time.perf_counter() - begin) * 1e3:.1f} ms"
+        f" for {len(found)} trips"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Per-message store_query_to_external_db versus the write-behind buffer.
+
+Produces N_MESSAGES at RATE messages/s, either spawning one task per
+message like BackgroundTasks did, or handing each to WriteBehindBuffer.
+Reports throughput, peak asyncio tasks and peak external round trips in
+flight. Buffered throughput is capped at max_flushes * max_batch
+messages per round trip, so it runs with two flush limits. The simulated round trip is shortened to LATENCY seconds.
+
+Run from ch-8 with: python -m benchmarks.bench_write_behind
+"""
+import asyncio
+import logging
+import time
+
+from app import background_task
+from app.background_task import (
+    WriteBehindBuffer,
+    store_queries_to_external_db,
+    store_query_to_external_db,
+)
+
+N_MESSAGES = 20_000
+RATE = 10_000
+LATENCY = 0.5
+
+logging.getLogger("uvicorn.error").setLevel(logging.WARNING)
+
+
+class Probe:
+    """Counts round trips in flight and samples asyncio tasks."""
+
+    def __init__(self, func):
+        self.func = func
+        self.in_flight = self.peak_in_flight = self.peak_tasks = 0
+
+    async def __call__(self, *args):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await self.func(*args)
+        finally:
+            self.in_flight -= 1
+
+    async def sample_tasks(self):
+        while True:
+            self.peak_tasks = max(self.peak_tasks, len(asyncio.all_tasks()))
+            await asyncio.sleep(0.01)
+
+
+async def produce(handle):
+    start = time.perf_counter()
+    for i in range(N_MESSAGES):
+        await handle(f"Request {i}")
+        # keep to RATE messages per second
+        ahead = (i + 1) / RATE - (time.perf_counter() - start)
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+
+
+async def per_message() -> tuple[float, Probe]:
+    probe = Probe(store_query_to_external_db)
+    sampler = asyncio.create_task(probe.sample_tasks())
+    tasks = set()
+
+    async def handle(message):
+        task = asyncio.create_task(probe(message))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    start = time.perf_counter()
+    await produce(handle)
+    await asyncio.wait(tasks)
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    return N_MESSAGES / elapsed, probe
+
+
+async def buffered(max_flushes: int) -> tuple[float, Probe]:
+    probe = Probe(store_queries_to_external_db)
+    sampler = asyncio.create_task(probe.sample_tasks())
+    buffer = WriteBehindBuffer(probe, max_flushes=max_flushes)
+    buffer.start()
+    start = time.perf_counter()
+    await produce(buffer.add)
+    await buffer.close()
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    return N_MESSAGES / elapsed, probe
+
+
+async def main():
+    background_task.EXTERNAL_DB_LATENCY = LATENCY
+    print(
+        f"{N_MESSAGES} messages at {RATE}/s,"
+        f" {LATENCY * 1000:.0f}ms per external round trip"
+    )
+    runs = [("per message", per_message())] + [
+        (f"buffered, {n} flushes", buffered(n)) for n in (4, 8)
+    ]
+    for label, run in runs:
+        throughput, probe = await run
+        print(
+            f"{label:<20} {throughput:8.0f} msg/s"
+            f"  peak tasks {probe.peak_tasks:6d}"
+            f"  peak round trips {probe.peak_in_flight:6d}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,12 @@
+import asyncio
+
+import pytest
+
+from app.job_queue import SQLiteJobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    yield queue
+    asyncio.run(queue.close())
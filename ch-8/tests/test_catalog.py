@@ -0,0 +1,134 @@
+import json
+import os
+from datetime import date
+from types import MappingProxyType
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.catalog import (
+    Catalog,
+    CatalogRegistry,
+    Coupon,
+    catalog_registry,
+    get_catalog,
+)
+from app.job_queue import get_job_queue
+from app.main import app
+
+CATALOG = {
+    "categories": ["cruises", "city-breaks"],
+    "coupons": [
+        {"code": "CRUISE10", "category": "cruises"},
+        {
+            "code": "ONCE",
+            "category": "cruises",
+            "expires": "2999-01-01",
+            "max_uses": 1,
+        },
+        {"code": "OLD", "category": "cruises", "expires": "2000-01-01"},
+    ],
+}
+
+
+def write_catalog(path, data, mtime_ns=None):
+    with open(path, "w") as f:
+        json.dump(data, f)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def registry(tmp_path):
+    path = tmp_path / "catalog.json"
+    write_catalog(path, CATALOG)
+    return CatalogRegistry(str(path), reload_interval=0)
+
+
+@pytest.fixture
+def client(registry, queue):
+    app.dependency_overrides[get_catalog] = registry.current
+    app.dependency_overrides[get_job_queue] = lambda: queue
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    catalog_registry.reset_uses()
+
+
+def test_catalog_is_immutable(registry):
+    catalog = registry.current()
+    assert isinstance(catalog.categories, frozenset)
+    assert isinstance(catalog.coupons, MappingProxyType)
+    with pytest.raises(TypeError):
+        catalog.coupons["cruises", "FREE"] = None
+
+
+def test_catalog_rejects_coupon_for_unknown_category():
+    with pytest.raises(ValueError):
+        Catalog.from_dict({
+            "categories": ["cruises"],
+            "coupons": [{"code": "X", "category": "safari"}],
+        })
+
+
+def test_registry_reloads_changed_file(registry):
+    assert "safari" not in registry.current().categories
+    write_catalog(
+        registry.path,
+        {**CATALOG, "categories": [*CATALOG["categories"], "safari"]},
+        mtime_ns=os.stat(registry.path).st_mtime_ns + 1_000_000_000,
+    )
+    assert "safari" in registry.current().categories
+
+
+def test_registry_keeps_last_good_catalog_on_bad_file(registry):
+    before = registry.current()
+    with open(registry.path, "w") as f:
+        f.write("{not json")
+    os.utime(registry.path, ns=(1, 1))
+    assert registry.current() is before
+
+
+def test_coupon_expiry_and_usage_limit(registry):
+    coupon = Coupon("ONCE", "cruises", date(2030, 1, 1), max_uses=2)
+    assert not coupon.expired(date(2030, 1, 1))
+    assert coupon.expired(date(2030, 1, 2))
+    assert [registry.redeem(coupon) for _ in range(3)] == [True, True, False]
+    assert registry.uses("ONCE") == 2
+
+
+def test_trips_by_category_uses_the_catalog(client):
+    response = client.get("/v2/trips/cruises", params={"code": "CRUISE10"})
+    assert "discount" in response.json()
+
+    for code in ("OLD", "CITYBREAK15"):
+        response = client.get("/v2/trips/cruises", params={"code": code})
+        assert "discount" not in response.json()
+
+    assert client.get("/v2/trips/safari").status_code == 422
+
+
+def test_only_applying_a_coupon_counts_a_use(client):
+    params = {"code": "ONCE"}
+    first = client.get("/v2/trips/cruises", params=params)
+    assert "discount" in first.json()
+    revalidated = client.get(
+        "/v2/trips/cruises",
+        params=params,
+        headers={"If-None-Match": first.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+    assert catalog_registry.uses("ONCE") == 0
+
+    response = client.post("/v2/trips/cruises/coupon", params=params)
+    assert response.status_code == 200
+    assert catalog_registry.uses("ONCE") == 1
+    response = client.post("/v2/trips/cruises/coupon", params=params)
+    assert response.status_code == 409
+    assert "discount" not in client.get(
+        "/v2/trips/cruises", params=params
+    ).json()
+
+    response = client.post(
+        "/v2/trips/cruises/coupon", params={"code": "OLD"}
+    )
+    assert response.status_code == 409
@@ -0,0 +1,29 @@
+from datetime import date, datetime, timedelta
+
+from fastapi.testclient import TestClient
+
+from app import dependencies
+from app.main import app
+
+
+def test_today_is_cached_until_midnight(monkeypatch):
+    monkeypatch.setattr(dependencies, "_today", (date.min, 0.0))
+    evening = datetime(2025, 3, 1, 23, 59).timestamp()
+    monkeypatch.setattr(dependencies.time, "time", lambda: evening)
+    assert dependencies.today() == date(2025, 3, 1)
+
+    after_midnight = evening + timedelta(minutes=2).total_seconds()
+    monkeypatch.setattr(dependencies.time, "time", lambda: after_midnight)
+    assert dependencies.today() == date(2025, 3, 2)
+
+
+def test_v1_trips_defaults_start_to_the_current_day(monkeypatch):
+    monkeypatch.setattr(dependencies, "today", lambda: date(2030, 1, 2))
+    client = TestClient(app)
+    response = client.get("/v1/trips")
+    assert response.json() == "Request trips from 2030-01-02 to None"
+
+    response = client.get(
+        "/v1/trips", params={"start": "2030-01-05", "end": "2030-01-03"}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,108 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.job_queue import get_job_queue
+from app.main import app
+from app.metrics import JOBS_ENQUEUED
+from app.prometheus import registry
+from app.worker import Worker
+
+
+def test_claimed_job_is_leased_and_completed(queue):
+    async def scenario():
+        job_id = await queue.enqueue("echo", {"message": "hi"})
+        [job] = await queue.claim(10, visibility_timeout=30)
+        assert (job.id, job.payload, job.attempts) == (
+            job_id, {"message": "hi"}, 1
+        )
+        assert await queue.claim(10, visibility_timeout=30) == []
+        assert await queue.depth() == {
+            "queued": 0, "running": 1, "failed": 0
+        }
+        assert await queue.complete(job)
+        assert await queue.depth() == {
+            "queued": 0, "running": 0, "failed": 0
+        }
+
+    asyncio.run(scenario())
+
+
+def test_expired_lease_is_redelivered_and_old_lease_rejected(queue):
+    async def scenario():
+        await queue.enqueue("echo", {})
+        [first] = await queue.claim(1, visibility_timeout=0)
+        [second] = await queue.claim(1, visibility_timeout=30)
+        assert second.id == first.id and second.attempts == 2
+        assert not await queue.complete(first)
+        assert await queue.complete(second)
+
+    asyncio.run(scenario())
+
+
+def test_delayed_job_is_not_claimed_early(queue):
+    async def scenario():
+        await queue.enqueue("echo", {}, delay=60)
+        assert await queue.claim(1, visibility_timeout=30) == []
+        assert (await queue.depth())["queued"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_worker_retries_then_fails(queue):
+    calls = []
+
+    async def flaky(message):
+        calls.append(message)
+        raise RuntimeError("external db down")
+
+    async def scenario():
+        await queue.enqueue("flaky", {"message": "hi"}, max_attempts=3)
+        worker = Worker(queue, tasks={"flaky": flaky}, backoff_base=0)
+        await worker.run_until_empty()
+        return await queue.depth()
+
+    depth = asyncio.run(scenario())
+    assert calls == ["hi"] * 3
+    assert depth == {"queued": 0, "running": 0, "failed": 1}
+
+
+def test_worker_runs_jobs_within_concurrency_limit(queue):
+    active = peak = 0
+
+    async def task():
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    async def scenario():
+        for _ in range(10):
+            await queue.enqueue("task", {})
+        await queue.enqueue("missing", {})
+        worker = Worker(queue, tasks={"task": task}, concurrency=3)
+        await worker.run_until_empty()
+        return await queue.depth()
+
+    depth = asyncio.run(scenario())
+    assert peak == 3
+    assert depth == {"queued": 0, "running": 0, "failed": 1}
+
+
+def test_trips_by_category_enqueues_the_query(queue):
+    registry.clear()
+    app.dependency_overrides[get_job_queue] = lambda: queue
+    try:
+        client = TestClient(app)
+        response = client.get(
+            "/v2/trips/cruises", params={"code": "CRUISE10"}
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert JOBS_ENQUEUED.get("store_query_to_external_db") == 1
+
+    [job] = asyncio.run(queue.claim(10, visibility_timeout=30))
+    assert job.task == "store_query_to_external_db"
+    assert job.payload == {"message": response.json()}
@@ -8,6 +8,19 @@ from app.main import app
 def test_get_v1_trips_endpoint():
     client = TestClient(app)
     app.dependency_overrides[time_range] = lambda: (date.fromisoformat("2024-09-23"), None)
-    response = client.get("/v1/trips")
+    try:
+        response = client.get("/v1/trips")
+    finally:
+        app.dependency_overrides.clear()
     assert response.status_code == 200
-    assert response.json() == f"Request trips from {date.fromisoformat('2024-09-23')} to None"
\ No newline at end of file
+    assert response.json() == f"Request trips from {date.fromisoformat('2024-09-23')} to None"
+
+def test_metrics_endpoint_counts_requests():
+    client = TestClient(app)
+    client.get("/")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert (
+        'http_requests_total{method="GET",route="/",status="200"}'
+        in response.text
+    )
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import response_cache
+from app.job_queue import get_job_queue
+from app.main import app, trips_cache
+from app.metrics import RESPONSE_CACHE_REQUESTS
+from app.prometheus import registry
+from app.response_cache import ResponseCache
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    registry.clear()
+    trips_cache.clear()
+    yield
+    trips_cache.clear()
+
+
+def counting_app(cache: ResponseCache):
+    api = FastAPI()
+    calls = []
+
+    @api.get("/double/{n}")
+    @cache.cached(key=("n",))
+    async def double(n: int):
+        calls.append(n)
+        return {"n": n * 2}
+
+    return api, calls
+
+
+def test_cached_route_runs_once_per_key():
+    cache = ResponseCache("double", ttl=60)
+    api, calls = counting_app(cache)
+    client = TestClient(api)
+    responses = [client.get(f"/double/{n}") for n in (1, 1, 2, 1)]
+    assert [r.json() for r in responses] == [
+        {"n": 2}, {"n": 2}, {"n": 4}, {"n": 2}
+    ]
+    assert calls == [1, 2]
+    assert RESPONSE_CACHE_REQUESTS.get("double", "hit") == 2
+    assert RESPONSE_CACHE_REQUESTS.get("double", "miss") == 2
+    assert responses[0].headers["cache-control"] == "max-age=60"
+
+
+def test_cache_evicts_least_recently_used_and_expired(monkeypatch):
+    now = 0.0
+    monkeypatch.setattr(response_cache.time, "monotonic", lambda: now)
+    cache = ResponseCache("double", ttl=10, maxsize=2)
+    for key in (1, 2):
+        cache.set((key,), response_cache.encode(key))
+    assert cache.get((1,)) is not None
+    cache.set((3,), response_cache.encode(3))
+    assert cache.get((2,)) is None
+    assert len(cache) == 2
+
+    now = 11.0
+    assert cache.get((1,)) is None
+    assert len(cache) == 1
+
+
+def test_matching_etag_gets_not_modified():
+    api, _ = counting_app(ResponseCache("double"))
+    client = TestClient(api)
+    etag = client.get("/double/3").headers["etag"]
+    response = client.get("/double/3", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    response = client.get("/double/3", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+
+def test_cached_trips_still_enqueue_every_query(queue):
+    app.dependency_overrides[get_job_queue] = lambda: queue
+    try:
+        client = TestClient(app)
+        responses = [
+            client.get("/v2/trips/cruises", params={"code": "CRUISE10"})
+            for _ in range(3)
+        ]
+    finally:
+        app.dependency_overrides.clear()
+    assert len({r.content for r in responses}) == 1
+    assert responses[0].headers["cache-control"] == "no-cache"
+    assert RESPONSE_CACHE_REQUESTS.get("trips_by_category", "hit") == 2
+
+    jobs = asyncio.run(queue.claim(10, visibility_timeout=30))
+    assert [job.payload for job in jobs] == (
+        [{"message": responses[0].json()}] * 3
+    )
@@ -0,0 +1,93 @@
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.trips import Trip, TripCatalog, get_trip_catalog
+
+
+def trip(id, category, start):
+    start = date.fromisoformat(start)
+    return Trip(id, category, "Lisbon", start, start, 100)
+
+
+@pytest.fixture
+def catalog():
+    return TripCatalog([
+        trip(1, "cruises", "2030-01-10"),
+        trip(2, "city-breaks", "2030-01-05"),
+        trip(3, "cruises", "2030-01-01"),
+        trip(4, "cruises", "2030-01-10"),
+        trip(5, "cruises", "2030-02-01"),
+    ])
+
+
+def ids(page):
+    return [trip.id for trip in page.trips]
+
+
+def test_search_by_date_range_is_inclusive_and_sorted(catalog):
+    page = catalog.search(date(2030, 1, 1), date(2030, 1, 10))
+    assert ids(page) == [3, 2, 1, 4]
+    assert page.total == 4
+
+    page = catalog.search(date(2030, 1, 2), None, category="cruises")
+    assert ids(page) == [1, 4, 5]
+
+    assert catalog.search(date(2031, 1, 1)).total == 0
+    assert catalog.search(category="safari").total == 0
+
+
+def test_search_pages_with_offset(catalog):
+    page = catalog.search(date(2030, 1, 1), category="cruises", limit=2)
+    assert ids(page) == [3, 1]
+    assert (page.total, page.next_offset) == (4, 2)
+
+    page = catalog.search(
+        date(2030, 1, 1), category="cruises", offset=2, limit=2
+    )
+    assert ids(page) == [4, 5]
+    assert page.next_offset is None
+
+
+def test_catalog_loads_csv(tmp_path):
+    path = tmp_path / "trips.csv"
+    path.write_text(
+        "id,category,destination,start,end,price\n"
+        "1,cruises,Alaska,2030-06-01,2030-06-08,1200\n"
+    )
+    catalog = TripCatalog.from_file(str(path))
+    assert catalog.search().trips == [
+        Trip(1, "cruises", "Alaska", date(2030, 6, 1), date(2030, 6, 8), 1200)
+    ]
+
+
+def test_search_endpoint_uses_time_range_and_category(catalog):
+    app.dependency_overrides[get_trip_catalog] = lambda: catalog
+    try:
+        client = TestClient(app)
+        response = client.get(
+            "/v2/trips/cruises/search",
+            params={"start": "2030-01-05", "end": "2030-01-31", "limit": 1},
+        )
+        bad_range = client.get(
+            "/v2/trips/cruises/search",
+            params={"start": "2030-01-05", "end": "2030-01-01"},
+        )
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert response.json() == {
+        "trips": [{
+            "id": 1,
+            "category": "cruises",
+            "destination": "Lisbon",
+            "start": "2030-01-10",
+            "end": "2030-01-10",
+            "price": 100,
+        }],
+        "total": 2,
+        "next_offset": 1,
+    }
+    assert bad_range.status_code == 400
@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from app.background_task import WriteBehindBuffer
+
+
+class Recorder:
+    def __init__(self, delay: float = 0):
+        self.delay = delay
+        self.batches = []
+
+    async def __call__(self, items):
+        await asyncio.sleep(self.delay)
+        self.batches.append(list(items))
+
+
+def test_full_batches_flush_without_waiting_for_the_delay():
+    flush = Recorder()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(flush, max_batch=3, max_delay=60)
+        buffer.start()
+        await asyncio.gather(*(buffer.submit(i) for i in range(6)))
+        await buffer.close()
+
+    asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+    assert flush.batches == [[0, 1, 2], [3, 4, 5]]
+
+
+def test_partial_batch_flushes_after_the_delay():
+    flush = Recorder()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(flush, max_batch=100, max_delay=0.05)
+        buffer.start()
+        await buffer.add("a")
+        await buffer.add("b")
+        await asyncio.sleep(0.2)
+        batches = list(flush.batches)
+        await buffer.close()
+        return batches
+
+    assert asyncio.run(scenario()) == [["a", "b"]]
+
+
+def test_partial_batch_after_an_idle_buffer_is_flushed():
+    flush = Recorder()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(flush, max_batch=100, max_delay=0.05)
+        buffer.start()
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(buffer.submit("a"), timeout=1)
+        await asyncio.sleep(0.01)
+        await asyncio.wait_for(buffer.submit("b"), timeout=1)
+        await buffer.close()
+
+    asyncio.run(scenario())
+    assert flush.batches == [["a"], ["b"]]
+
+
+def test_close_drains_buffered_items():
+    flush = Recorder()
+
+    async def scenario():
+        buffer = WriteBehindBuffer(flush, max_batch=100, max_delay=60)
+        buffer.start()
+        for i in range(5):
+            await buffer.add(i)
+        await buffer.close()
+        with pytest.raises(RuntimeError):
+            await buffer.add(5)
+
+    asyncio.run(scenario())
+    assert flush.batches == [[0, 1, 2, 3, 4]]
+
+
+def test_add_waits_when_max_pending_items_are_unwritten():
+    flush = Recorder(delay=0.1)
+
+    async def scenario():
+        buffer = WriteBehindBuffer(
+            flush, max_batch=2, max_delay=0, max_pending=2
+        )
+        buffer.start()
+        await buffer.add(0)
+        await buffer.add(1)
+        blocked = asyncio.create_task(buffer.add(2))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        await asyncio.wait_for(blocked, timeout=1)
+        await buffer.close()
+
+    asyncio.run(scenario())
+    assert flush.batches == [[0, 1], [2]]
+
+
+def test_submit_raises_when_its_batch_fails():
+    async def broken(items):
+        raise ConnectionError("external db down")
+
+    async def scenario():
+        buffer = WriteBehindBuffer(broken, max_batch=1, max_delay=0)
+        buffer.start()
+        with pytest.raises(ConnectionError):
+            await buffer.submit("a")
+        await buffer.close()
+        return buffer.failed
+
+    assert asyncio.run(scenario()) == 1